@@ -1,4 +1,3 @@
-import base64
 import json
 import re
 import math
@@ -6,6 +5,67 @@ from google.generativeai import GenerativeModel
 from google.ai.generativelanguage import Content, Part
 import PIL.Image
 import io
+import logging
+from config import DIFFICULTY_LEVELS
+from utils.data_urls import parse_image_data_url
+from utils.json_parsing import iter_json_objects, loads
+
+logger = logging.getLogger(__name__)
+
+# JSON extraction pattern for Gemini responses, compiled once
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+
+# Phrases showing the LLM already worked a hint into its feedback
+_HINT_MARKERS = ("hint:", "try looking", "what about")
+
+# Field patterns for extract_evaluation_manually: strict JSON-style first, then a looser fallback
+_FEEDBACK_RE = re.compile(r'"feedback"\s*:\s*"(.*?)"(?=\s*,\s*"\w+"\s*:|\s*\})', re.DOTALL)
+_FEEDBACK_LOOSE_RE = re.compile(r'feedback["\']?\s*[:=]\s*["\']?(.*?)["\']?\s*(?:,|\n\s*["\']?(?:newly|hint|score|advance)|$)', re.IGNORECASE | re.DOTALL)
+_DETAILS_RE = re.compile(r'"newly_identified_details"\s*:\s*(\[.*?\])', re.DOTALL)
+_QUOTED_STRING_RE = re.compile(r'"(.*?)"')
+_DETAILS_LOOSE_RE = re.compile(r'newly.*?details["\']?\s*[:=]\s*\[?(.*?)\]?(?:,|\n\s*["\']?(?:hint|score|advance)|$)', re.IGNORECASE | re.DOTALL)
+_DETAIL_SEPARATOR_RE = re.compile(r'[,\n]|\s*-\s*|\s*\*\s*')
+_HINT_RE = re.compile(r'"hint"\s*:\s*(?:"(.*?)"|null)', re.DOTALL)
+_HINT_LOOSE_RE = re.compile(r'hint["\']?\s*[:=]\s*["\']?(.*?)["\']?\s*(?:,|\n\s*["\']?(?:score|advance)|$)', re.IGNORECASE | re.DOTALL)
+_SCORE_RE = re.compile(r'"score"\s*:\s*(\d+)')
+_SCORE_LOOSE_RE = re.compile(r'score["\']?\s*[:=]\s*(\d+)', re.IGNORECASE)
+_ADVANCE_RE = re.compile(r'"advance_difficulty"\s*:\s*(true|false)', re.IGNORECASE)
+_ADVANCE_LOOSE_RE = re.compile(r'advance.*?difficulty["\']?\s*[:=]\s*(true|false)', re.IGNORECASE)
+
+# Expected evaluation fields as (key, default, validator); missing or invalid values fall back to the default
+_EVALUATION_FIELDS = (
+    ("feedback", "Great job describing what you see! Can you tell me anything else?", lambda value: isinstance(value, str)),
+    ("newly_identified_details", (), lambda value: isinstance(value, list)),
+    ("hint", None, lambda value: True),
+    ("score", 0, lambda value: isinstance(value, int) and 0 <= value <= 100),
+    ("advance_difficulty", False, lambda value: isinstance(value, bool)),
+)
+
+def _validate_evaluation_fields(evaluation):
+    """
+    Return the evaluation fields in one pass over _EVALUATION_FIELDS,
+    replacing missing or wrongly typed values with their defaults.
+    """
+    fields = {}
+    for key, default, is_valid in _EVALUATION_FIELDS:
+        value = evaluation.get(key, default)
+        fields[key] = value if is_valid(value) else default
+    return fields
+
+def _image_to_inline_data(image_input):
+    """
+    Convert a PIL Image or an image data URL into the (mime_type, bytes) pair
+    sent to Gemini Vision. Returns None for unsupported input types.
+    """
+    if hasattr(image_input, 'save'):  # This is a PIL Image
+        buffer = io.BytesIO()
+        # The PNG only travels to the vision model, so use zlib's fastest level
+        image_input.save(buffer, format="PNG", compress_level=1)
+        return "image/png", buffer.getvalue()
+    if isinstance(image_input, str) and image_input.startswith('data:image'):
+        # This is a data URL, e.g. "data:image/jpeg;base64,...."
+        return parse_image_data_url(image_input)
+    return None
 
 def generate_detailed_description(image_input, prompt, difficulty, topic_focus):
     """
@@ -16,17 +76,10 @@ def generate_detailed_description(image_input, prompt, difficulty, topic_focus):
         return "Error: No image provided. Please make sure an image is generated or uploaded first."
 
     try:
-        # Convert the image to base64 format depending on the input type
-        if hasattr(image_input, 'save'):  # This is a PIL Image
-            buffer = io.BytesIO()
-            image_input.save(buffer, format="PNG")
-            img_bytes = buffer.getvalue()
-            base64_img = base64.b64encode(img_bytes).decode('utf-8')
-        elif isinstance(image_input, str) and image_input.startswith('data:image'):
-            # This is a data URL
-            base64_img = image_input.split(",")[1]
-        else:
+        inline_data = _image_to_inline_data(image_input)
+        if inline_data is None:
             return "Error: Unsupported image format"
+        mime_type, img_bytes = inline_data
 
         query = (
             f"""
@@ -46,7 +99,7 @@ def generate_detailed_description(image_input, prompt, difficulty, topic_focus):
             """
         )
         vision_model = GenerativeModel('gemini-2.5-flash')
-        image_part = Part(inline_data={"mime_type": "image/png", "data": base64.b64decode(base64_img)})
+        image_part = Part(inline_data={"mime_type": mime_type, "data": img_bytes})
         text_part = Part(text=query)
         multimodal_content = Content(parts=[image_part, text_part])
         response = vision_model.generate_content(multimodal_content)
@@ -66,17 +119,10 @@ def extract_key_details(image_input, prompt, topic_focus):
         return ["Error: No image provided"]
 
     try:
-        # Convert the image to base64 format depending on the input type
-        if hasattr(image_input, 'save'):  # This is a PIL Image
-            buffer = io.BytesIO()
-            image_input.save(buffer, format="PNG")
-            img_bytes = buffer.getvalue()
-            base64_img = base64.b64encode(img_bytes).decode('utf-8')
-        elif isinstance(image_input, str) and image_input.startswith('data:image'):
-            # This is a data URL
-            base64_img = image_input.split(",")[1]
-        else:
+        inline_data = _image_to_inline_data(image_input)
+        if inline_data is None:
             return ["Error: Unsupported image format"]
+        mime_type, img_bytes = inline_data
 
         query = (
             f"""
@@ -96,23 +142,24 @@ def extract_key_details(image_input, prompt, topic_focus):
             """
         )
         vision_model = GenerativeModel('gemini-2.5-flash')
-        image_part = Part(inline_data={"mime_type": "image/png", "data": base64.b64decode(base64_img)})
+        image_part = Part(inline_data={"mime_type": mime_type, "data": img_bytes})
         text_part = Part(text=query)
         multimodal_content = Content(parts=[image_part, text_part])
         response = vision_model.generate_content(multimodal_content)
         try:
-            details_match = re.search(r'\[.*\]', response.text, re.DOTALL)
+            details_match = _JSON_ARRAY_RE.search(response.text)
             if details_match:
                 details_json = details_match.group(0)
-                key_details = json.loads(details_json)
+                key_details = loads(details_json)
                 return key_details
             else:
                 # If no JSON array is found, try to extract bullet points or lines
                 lines = response.text.split('\n')
                 details = []
                 for line in lines:
-                    if line.strip().startswith('-') or line.strip().startswith('*'):
-                        details.append(line.strip()[1:].strip())
+                    line = line.strip()
+                    if line.startswith(('-', '*')):
+                        details.append(line[1:].strip())
                 return details[:15] if details else ["object in image", "color", "shape", "background"]
         except Exception as e:
             print(f"Error extracting key details from response: {str(e)}")
@@ -133,16 +180,17 @@ def compare_details_chat_fn(user_details, active_session, global_image_data_url,
     chat_history = active_session.get("chat", [])
     history_text = ""
     if chat_history:
-        history_text = "\n### Previous Conversation:\n"
-        for idx, (speaker, msg) in enumerate(chat_history, 1):
-            history_text += f"Turn {idx}:\n{speaker}: {msg}\n"
+        history_text = "\n### Previous Conversation:\n" + "".join(
+            f"Turn {idx}:\n{speaker}: {msg}\n" for idx, (speaker, msg) in enumerate(chat_history, 1)
+        )
 
     key_details = active_session.get("key_details", [])
     identified_details = active_session.get("identified_details", [])
     used_hints = active_session.get("used_hints", [])
 
     # Filter out key details that have already been identified
-    remaining_key_details = [kd for kd in key_details if kd not in identified_details]
+    identified_set = set(identified_details)
+    remaining_key_details = [kd for kd in key_details if kd not in identified_set]
 
     # Format for display
     key_details_text = "\n### Key Details to Identify (Focus on these remaining ones):\n" + "\n".join(f"- {detail}" for detail in remaining_key_details)
@@ -239,62 +287,59 @@ def parse_evaluation(evaluation_text, active_session):
         print(f"Raw text: {evaluation_text[:500]}...") # Log beginning of raw text
 
         # Attempt to extract JSON robustly
-        evaluation = {}
+        evaluation = None
+        # Try fenced JSON blocks first, then each balanced object, until one parses
         json_str = None
-        # Regex to find JSON block, potentially cleaning surrounding text/markdown
-        json_match = re.search(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```|(\{[\s\S]*?\})(?=\s*$)', evaluation_text, re.DOTALL)
-
-        if json_match:
-            # Prioritize the first capture group if both exist (usually markdown block)
-            json_str = json_match.group(1) if json_match.group(1) else json_match.group(2)
-            print(f"Found JSON string: {json_str[:200]}...")
+        for candidate in iter_json_objects(evaluation_text):
+            json_str = json_str or candidate
+            print(f"Found JSON string: {candidate[:200]}...")
             try:
-                # Basic cleaning
-                json_str = json_str.strip()
                 # Attempt standard parsing
-                evaluation = json.loads(json_str)
-                print(f"Successfully parsed JSON: {evaluation}")
+                parsed = loads(candidate)
             except json.JSONDecodeError as e:
-                print(f"JSON Decode Error: {e}. Attempting manual extraction from string: {json_str}")
-                # Fallback to regex on the extracted string if direct parse fails
-                evaluation = extract_evaluation_manually(json_str)
+                print(f"JSON Decode Error: {e}. Trying the next candidate.")
+                continue
+            if isinstance(parsed, dict):
+                evaluation = parsed
+                print(f"Successfully parsed JSON: {evaluation}")
+                break
 
-        else:
-            print("No clear JSON object found. Attempting manual extraction from full text.")
-            # Fallback to regex on the entire text if no JSON block found
-            evaluation = extract_evaluation_manually(evaluation_text)
+        if evaluation is None:
+            if json_str:
+                print(f"No candidate parsed. Attempting manual extraction from string: {json_str}")
+                # Fallback to regex on the first extracted string if no candidate parses
+                evaluation = extract_evaluation_manually(json_str)
+            else:
+                print("No clear JSON object found. Attempting manual extraction from full text.")
+                # Fallback to regex on the entire text if no JSON block found
+                evaluation = extract_evaluation_manually(evaluation_text)
 
         # --- Process Evaluation Data ---
-        feedback = evaluation.get("feedback", "Great job describing what you see! Can you tell me anything else?")
-        # Ensure newly_identified_details is always a list of strings
-        newly_identified_details = evaluation.get("newly_identified_details", [])
-        if not isinstance(newly_identified_details, list):
-            newly_identified_details = [] # Default to empty list if format is wrong
+        fields = _validate_evaluation_fields(evaluation)
+        feedback = fields["feedback"]
         # Filter out non-strings or empty strings
-        newly_identified_details = [str(detail).strip() for detail in newly_identified_details if isinstance(detail, str) and str(detail).strip()]
-
-        hint = evaluation.get("hint") # Allow None/null
-        score = evaluation.get("score", 0)
-        if not isinstance(score, int) or score < 0 or score > 100:
-             score = 0 # Default invalid scores
-        advance_difficulty = evaluation.get("advance_difficulty", False)
-        if not isinstance(advance_difficulty, bool):
-            advance_difficulty = False # Default invalid booleans
-
-        print(f"Parsed - Feedback: {feedback[:50]}...")
-        print(f"Parsed - Newly Identified Details: {newly_identified_details}")
-        print(f"Parsed - Hint: {hint}")
-        print(f"Parsed - Score: {score}")
-        print(f"Parsed - Advance Difficulty (LLM): {advance_difficulty}")
+        newly_identified_details = [detail.strip() for detail in fields["newly_identified_details"] if isinstance(detail, str) and detail.strip()]
+        hint = fields["hint"] # Allow None/null
+        score = fields["score"]
+        advance_difficulty = fields["advance_difficulty"]
+
+        logger.debug("Parsed - Feedback: %.50s...", feedback)
+        logger.debug("Parsed - Newly Identified Details: %s", newly_identified_details)
+        logger.debug("Parsed - Hint: %s", hint)
+        logger.debug("Parsed - Score: %s", score)
+        logger.debug("Parsed - Advance Difficulty (LLM): %s", advance_difficulty)
 
         # Update the active session
         # Note: `update_checklist` handles the identification logic now based on these exact strings
         identified_details = active_session.get("identified_details", []).copy()
+        key_details_set = set(active_session.get("key_details", []))
+        identified_set = set(identified_details)
         details_added_this_turn = []
         for detail in newly_identified_details:
             # Check against the canonical list of key details for validity
-            if detail in active_session.get("key_details", []) and detail not in identified_details:
+            if detail in key_details_set and detail not in identified_set:
                 identified_details.append(detail)
+                identified_set.add(detail)
                 details_added_this_turn.append(detail) # Track what's new *this* turn
         active_session["identified_details"] = identified_details
         print(f"Updated Session - Total Identified Details: {identified_details}")
@@ -308,7 +353,8 @@ def parse_evaluation(evaluation_text, active_session):
                 # Append hint to feedback only if it's new and wasn't already included by LLM
                 if hint not in feedback:
                      # Check for common hint phrases LLM might use
-                     if "hint:" not in feedback.lower() and "try looking" not in feedback.lower() and "what about" not in feedback.lower():
+                     feedback_lower = feedback.lower()
+                     if not any(marker in feedback_lower for marker in _HINT_MARKERS):
                          feedback += f"\n\n✨ Maybe look closer at: {hint}"
                      else:
                          # If LLM likely included it, don't double-add
@@ -327,19 +373,11 @@ def parse_evaluation(evaluation_text, active_session):
         current_difficulty = active_session.get("difficulty", "Very Simple")
         new_difficulty = current_difficulty # Default to current
 
-        # Example: Assuming config.DIFFICULTY_LEVELS exists
-        try:
-            from VisoLearn import config # Make sure config is accessible
-            difficulties = config.DIFFICULTY_LEVELS
-        except (ImportError, AttributeError):
-            print("Warning: Could not import config.DIFFICULTY_LEVELS. Using default list.")
-            difficulties = ["Very Simple", "Simple", "Medium", "Complex", "Very Complex"] # Fallback
-
         if should_advance:
             try:
-                current_index = difficulties.index(current_difficulty)
-                if current_index < len(difficulties) - 1:
-                    new_difficulty = difficulties[current_index + 1]
+                current_index = DIFFICULTY_LEVELS.index(current_difficulty)
+                if current_index < len(DIFFICULTY_LEVELS) - 1:
+                    new_difficulty = DIFFICULTY_LEVELS[current_index + 1]
                     print(f"Advancing difficulty from {current_difficulty} to {new_difficulty}")
                 else:
                     print("Already at max difficulty.")
@@ -368,55 +406,55 @@ def extract_evaluation_manually(text):
     print("Attempting manual extraction via Regex...")
 
     # More tolerant regex patterns
-    feedback_match = re.search(r'"feedback"\s*:\s*"(.*?)"(?=\s*,\s*"\w+"\s*:|\s*\})', text, re.DOTALL)
+    feedback_match = _FEEDBACK_RE.search(text)
     if feedback_match:
         evaluation["feedback"] = feedback_match.group(1).replace('\\"', '"').replace('\\n', '\n')
     else: # Fallback: less strict
-         feedback_match = re.search(r'feedback["\']?\s*[:=]\s*["\']?(.*?)["\']?\s*(?:,|\n\s*["\']?(?:newly|hint|score|advance)|$)', text, re.IGNORECASE | re.DOTALL)
+         feedback_match = _FEEDBACK_LOOSE_RE.search(text)
          if feedback_match: evaluation["feedback"] = feedback_match.group(1).strip()
 
 
-    details_match = re.search(r'"newly_identified_details"\s*:\s*(\[.*?\])', text, re.DOTALL)
+    details_match = _DETAILS_RE.search(text)
     if details_match:
         details_str = details_match.group(1)
         try:
             # Try parsing the list directly
-             evaluation["newly_identified_details"] = json.loads(details_str)
+             evaluation["newly_identified_details"] = loads(details_str)
              if not isinstance(evaluation["newly_identified_details"], list): evaluation["newly_identified_details"] = [] # Ensure list type
         except json.JSONDecodeError:
              # If direct parse fails, extract strings from it
-             evaluation["newly_identified_details"] = [d.strip() for d in re.findall(r'"(.*?)"', details_str) if d.strip()]
+             evaluation["newly_identified_details"] = [d.strip() for d in _QUOTED_STRING_RE.findall(details_str) if d.strip()]
     else: # Fallback: less strict list detection
-        details_match = re.search(r'newly.*?details["\']?\s*[:=]\s*\[?(.*?)\]?(?:,|\n\s*["\']?(?:hint|score|advance)|$)', text, re.IGNORECASE | re.DOTALL)
+        details_match = _DETAILS_LOOSE_RE.search(text)
         if details_match:
              details_text = details_match.group(1).strip()
              # Extract from comma/newline sep, or bullet points
-             details = [d.strip().strip('"\'') for d in re.split(r'[,\n]|\s*-\s*|\s*\*\s*', details_text) if d.strip()]
+             details = [d.strip().strip('"\'') for d in _DETAIL_SEPARATOR_RE.split(details_text) if d.strip()]
              evaluation["newly_identified_details"] = details
 
 
-    hint_match = re.search(r'"hint"\s*:\s*(?:"(.*?)"|null)', text, re.DOTALL)
+    hint_match = _HINT_RE.search(text)
     if hint_match:
         evaluation["hint"] = hint_match.group(1).replace('\\"', '"').replace('\\n', '\n') if hint_match.group(1) is not None else None
     else: # Fallback: less strict
-        hint_match = re.search(r'hint["\']?\s*[:=]\s*["\']?(.*?)["\']?\s*(?:,|\n\s*["\']?(?:score|advance)|$)', text, re.IGNORECASE | re.DOTALL)
+        hint_match = _HINT_LOOSE_RE.search(text)
         if hint_match:
             hint_text = hint_match.group(1).strip()
             evaluation["hint"] = None if hint_text.lower() in ['null', 'none', ''] else hint_text
 
 
-    score_match = re.search(r'"score"\s*:\s*(\d+)', text)
+    score_match = _SCORE_RE.search(text)
     if score_match:
         evaluation["score"] = int(score_match.group(1))
     else: # Fallback: less strict
-        score_match = re.search(r'score["\']?\s*[:=]\s*(\d+)', text, re.IGNORECASE)
+        score_match = _SCORE_LOOSE_RE.search(text)
         if score_match: evaluation["score"] = int(score_match.group(1))
 
-    advance_match = re.search(r'"advance_difficulty"\s*:\s*(true|false)', text, re.IGNORECASE)
+    advance_match = _ADVANCE_RE.search(text)
     if advance_match:
         evaluation["advance_difficulty"] = advance_match.group(1).lower() == "true"
     else: # Fallback: less strict
-        advance_match = re.search(r'advance.*?difficulty["\']?\s*[:=]\s*(true|false)', text, re.IGNORECASE)
+        advance_match = _ADVANCE_LOOSE_RE.search(text)
         if advance_match: evaluation["advance_difficulty"] = advance_match.group(1).lower() == "true"
 
     print(f"Manual extraction result: {evaluation}")
@@ -438,7 +476,7 @@ def update_checklist(checklist, newly_identified_exact_strings, key_details):
     # Normalize the list received from the LLM just in case (lower, strip)
     # Although the LLM was asked for exact strings, this adds robustness
     normalized_identified_set = {detail.lower().strip() for detail in newly_identified_exact_strings}
-    print(f"Normalized identified set for matching: {normalized_identified_set}")
+    logger.debug("Normalized identified set for matching: %s", normalized_identified_set)
 
     new_checklist = []
     updated_count = 0
@@ -452,7 +490,7 @@ def update_checklist(checklist, newly_identified_exact_strings, key_details):
 
         # If not already identified, check if it's in the newly identified set
         if not is_identified and normalized_detail_text in normalized_identified_set:
-            print(f"✓ Marking '{detail_text}' as identified.")
+            logger.debug("✓ Marking '%s' as identified.", detail_text)
             new_checklist.append({"detail": detail_text, "identified": True, "id": item_id})
             updated_count += 1
         else:
@@ -1,11 +1,15 @@
-import io
-import base64
 import os
+import threading
 from PIL import Image
 import config
 from google import genai
 from io import BytesIO
 import warnings
+try:
+    # pybase64 is a SIMD-accelerated drop-in for the stdlib module on large payloads
+    import pybase64 as base64
+except ImportError:
+    import base64
 warnings.filterwarnings("ignore", message="IMAGE_SAFETY is not a valid FinishReason")
 
 # Global variables to store the image data URL and prompt
@@ -13,10 +17,43 @@ global_image_data_url = None
 global_image_prompt = None
 global_image_description = None
 
+# Shared GenAI client as an (api_key, client) pair, reused across calls so connections are kept alive
+_genai_client = None
+_client_lock = threading.Lock()
+
+def _get_client(api_key):
+    """
+    Return the module-level GenAI client, creating it on first use or when the API key changes.
+    """
+    global _genai_client
+    cached = _genai_client
+    if cached is not None and cached[0] == api_key:
+        return cached[1]
+    with _client_lock:
+        cached = _genai_client
+        if cached is None or cached[0] != api_key:
+            cached = (api_key, genai.Client(api_key=api_key))
+            _genai_client = cached
+    return cached[1]
+
+def _write_bytes(path, data):
+    """
+    Write data to path straight through a file descriptor, without a buffered file object.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
 def generate_image_fn(selected_prompt, model="models/imagen-4.0-ultra-generate-preview-06-06", output_path=None):
     """
     Generate an image from the prompt via the Google Imagen 4.0 Ultra API.
-    Convert the image to a data URL and optionally save it to a file.
+    Convert the image to a data URL, stored in the returned image's info["data_url"],
+    and optionally save it to a file.
 
     Args:
         selected_prompt (str): The prompt to generate the image from.
@@ -28,6 +65,7 @@ def generate_image_fn(selected_prompt, model="models/imagen-4.0-ultra-generate-p
     """
     global global_image_data_url, global_image_prompt
     global_image_prompt = selected_prompt
+    global_image_data_url = None
 
     try:
         # Initialize Google GenAI client with API key from environment variables or config
@@ -44,7 +82,7 @@ def generate_image_fn(selected_prompt, model="models/imagen-4.0-ultra-generate-p
                 else:
                     raise ValueError("No Google API key found in environment variables or config")
 
-        client = genai.Client(api_key=gemini_api_key)
+        client = _get_client(gemini_api_key)
 
         # Generate image using Google Imagen 4.0 Ultra
         response = client.models.generate_images(
@@ -72,19 +110,20 @@ def generate_image_fn(selected_prompt, model="models/imagen-4.0-ultra-generate-p
         # Save the image to a file if output_path is provided
         if output_path:
             try:
-                os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                with open(output_path, "wb") as f:
-                    f.write(image_bytes)
+                directory = os.path.dirname(output_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                _write_bytes(output_path, image_bytes)
                 print(f"Successfully saved image to {output_path}")
             except Exception as e:
                 print(f"Error saving image to {output_path}: {str(e)}")
 
-        # Convert to base64 for data URL
-        buffered = io.BytesIO()
-        image.save(buffered, format="JPEG")  # Changed to JPEG to match output_mime_type
-        img_bytes = buffered.getvalue()
-        img_b64 = base64.b64encode(img_bytes).decode("utf-8")
-        global_image_data_url = f"data:image/jpeg;base64,{img_b64}"  # Changed to jpeg
+        # Build the data URL straight from the returned JPEG bytes and attach it to this image,
+        # so callers never have to pick it out of the shared globals another request may overwrite
+        img_b64 = base64.b64encode(image_bytes).decode("ascii")
+        data_url = f"data:image/jpeg;base64,{img_b64}"
+        image.info["data_url"] = data_url
+        global_image_data_url = data_url
 
         print(f"Successfully generated image with prompt: {selected_prompt[:50]}...")
         return image  # Return the PIL Image object
@@ -1,6 +1,47 @@
 from google.generativeai import GenerativeModel
-import json
-import re
+from utils.json_parsing import parse_json_object
+
+# Shared fields for the placeholder scenes of a fallback story premise
+_FALLBACK_SCENE_DEFAULTS = {
+    "key_elements": ("character", "setting", "action"),
+    "transition": "The story continues..."
+}
+
+def _fallback_story_premise(topic_focus, num_scenes):
+    """
+    Build the basic story premise used when the model response cannot be parsed.
+    """
+    return {
+        "premise": f"A simple story about {topic_focus}",
+        "educational_focus": topic_focus,
+        "num_scenes": num_scenes,
+        "scenes": [{"scene_number": i+1,
+                    "description": f"Scene {i+1} of the story",
+                    **_FALLBACK_SCENE_DEFAULTS,
+                    "key_elements": list(_FALLBACK_SCENE_DEFAULTS["key_elements"])} for i in range(num_scenes)]
+    }
+
+# Neutral evaluation returned when the story evaluation response cannot be parsed
+_FALLBACK_STORY_EVALUATION = {
+    "feedback": "Thank you for your description! Can you tell me more about what you see in the story?",
+    "story_understanding_score": 50,
+    "scene_details_score": 50,
+    "narrative_connection_score": 50,
+    "identified_elements": [],
+    "missed_elements": [],
+    "hint": "Look at what the characters are doing.",
+    "question_prompt": "What do you think happens next?",
+    "advance_to_next_scene": False
+}
+
+def _fallback_story_evaluation():
+    """
+    Return a fresh copy of the fallback story evaluation with its own element lists.
+    """
+    evaluation = _FALLBACK_STORY_EVALUATION.copy()
+    evaluation["identified_elements"] = []
+    evaluation["missed_elements"] = []
+    return evaluation
 
 def generate_story_premise(topic_focus, difficulty, age, autism_level):
     """
@@ -80,33 +121,16 @@ def generate_story_premise(topic_focus, difficulty, age, autism_level):
 
     try:
         # Find JSON in the response
-        json_match = re.search(r'\{[\s\S]*\}', response.text, re.DOTALL)
-        if json_match:
-            story_data = json.loads(json_match.group(0))
+        story_data = parse_json_object(response.text)
+        if story_data is not None:
             return story_data
         else:
             # Fallback structure if no valid JSON found
-            return {
-                "premise": f"A simple story about {topic_focus}",
-                "educational_focus": topic_focus,
-                "num_scenes": num_scenes,
-                "scenes": [{"scene_number": i+1,
-                           "description": f"Scene {i+1} of the story",
-                           "key_elements": ["character", "setting", "action"],
-                           "transition": "The story continues..."} for i in range(num_scenes)]
-            }
+            return _fallback_story_premise(topic_focus, num_scenes)
     except Exception as e:
         print(f"Error parsing story premise: {e}")
         # Return a basic fallback structure
-        return {
-            "premise": f"A simple story about {topic_focus}",
-            "educational_focus": topic_focus,
-            "num_scenes": num_scenes,
-            "scenes": [{"scene_number": i+1,
-                       "description": f"Scene {i+1} of the story",
-                       "key_elements": ["character", "setting", "action"],
-                       "transition": "The story continues..."} for i in range(num_scenes)]
-        }
+        return _fallback_story_premise(topic_focus, num_scenes)
 
 def generate_scene_prompt(scene_data, story_premise, difficulty, age, autism_level, image_style="Comic"):
     """
@@ -172,31 +196,33 @@ def evaluate_story_understanding(user_description, story_data, current_scene, ac
     Evaluate the user's understanding of the story based on their description.
     Provides feedback on story comprehension, not just image details.
     """
-    scene_info = story_data["scenes"][current_scene-1] if current_scene <= len(story_data["scenes"]) else None
+    scenes = story_data["scenes"]
+    num_scenes = len(scenes)
+    scene_info = scenes[current_scene-1] if current_scene <= num_scenes else None
     premise = story_data.get("premise", "")
+    autism_level = active_session.get('autism_level', 'Level 1')
     educational_focus = story_data.get("educational_focus", "")
 
     # Format previous scenes for context
     previous_scenes = ""
     if current_scene > 1:
-        previous_scenes = "Previous scenes:\n"
-        for i in range(current_scene-1):
-            prev_scene = story_data["scenes"][i]
-            previous_scenes += f"Scene {i+1}: {prev_scene.get('description', '')}\n"
+        previous_scenes = "Previous scenes:\n" + "".join(
+            f"Scene {i+1}: {prev_scene.get('description', '')}\n" for i, prev_scene in enumerate(scenes[:current_scene-1])
+        )
 
     # Format next scene for context (if not the last scene)
     next_scene = ""
-    if current_scene < len(story_data["scenes"]):
-        next_scene = f"Next scene: {story_data['scenes'][current_scene].get('description', '')}"
+    if current_scene < num_scenes:
+        next_scene = f"Next scene: {scenes[current_scene].get('description', '')}"
 
     query = f"""
-    You're evaluating a child with autism level {active_session.get('autism_level', 'Level 1')} who is describing a story.
+    You're evaluating a child with autism level {autism_level} who is describing a story.
 
     STORY INFORMATION:
     - Overall Story Premise: "{premise}"
     - Educational Focus: "{educational_focus}"
-    - Total Scenes: {len(story_data["scenes"])}
-    - Current Scene: {current_scene} of {len(story_data["scenes"])}
+    - Total Scenes: {num_scenes}
+    - Current Scene: {current_scene} of {num_scenes}
 
     CURRENT SCENE DETAILS:
     Description: "{scene_info.get('description', '')}"
@@ -220,7 +246,7 @@ def evaluate_story_understanding(user_description, story_data, current_scene, ac
 
     ADAPTATION CONSIDERATIONS:
     - Age: {active_session.get('age', '3')} years old
-    - Autism Level: {active_session.get('autism_level', 'Level 1')}
+    - Autism Level: {autism_level}
     - For Level 2/3 autism or young children, even partial understanding is significant
 
     RESPONSE FORMAT (JSON):
@@ -242,56 +268,35 @@ def evaluate_story_understanding(user_description, story_data, current_scene, ac
 
     try:
         # Find JSON in the response
-        json_match = re.search(r'\{[\s\S]*\}', response.text, re.DOTALL)
-        if json_match:
-            evaluation = json.loads(json_match.group(0))
+        evaluation = parse_json_object(response.text)
+        if evaluation is not None:
             return evaluation
         else:
             # Fallback structure
-            return {
-                "feedback": "Thank you for your description! Can you tell me more about what you see in the story?",
-                "story_understanding_score": 50,
-                "scene_details_score": 50,
-                "narrative_connection_score": 50,
-                "identified_elements": [],
-                "missed_elements": [],
-                "hint": "Look at what the characters are doing.",
-                "question_prompt": "What do you think happens next?",
-                "advance_to_next_scene": False
-            }
+            return _fallback_story_evaluation()
     except Exception as e:
         print(f"Error parsing story evaluation: {e}")
         # Fallback structure
-        return {
-            "feedback": "Thank you for your description! Can you tell me more about what you see in the story?",
-            "story_understanding_score": 50,
-            "scene_details_score": 50,
-            "narrative_connection_score": 50,
-            "identified_elements": [],
-            "missed_elements": [],
-            "hint": "Look at what the characters are doing.",
-            "question_prompt": "What do you think happens next?",
-            "advance_to_next_scene": False
-        }
+        return _fallback_story_evaluation()
 
 def summarize_story_progress(story_data, completed_scenes, active_session):
     """
     Generate a summary of the story progress so far.
     Useful when advancing to a new scene or completing the story.
     """
-    num_scenes = len(story_data["scenes"])
+    scenes = story_data["scenes"]
+    num_scenes = len(scenes)
     completed_count = len(completed_scenes)
     remaining_count = num_scenes - completed_count
+    autism_level = active_session.get('autism_level', 'Level 1')
 
     # Format completed scenes
-    completed_text = ""
-    for i, scene in enumerate(completed_scenes):
-        scene_num = i + 1
-        scene_info = story_data["scenes"][scene_num-1]
-        completed_text += f"Scene {scene_num}: {scene_info.get('description', '')}\n"
+    completed_text = "".join(
+        f"Scene {i+1}: {scene_info.get('description', '')}\n" for i, scene_info in enumerate(scenes[:completed_count])
+    )
 
     query = f"""
-    You're creating a story progress summary for a child with autism level {active_session.get('autism_level', 'Level 1')}.
+    You're creating a story progress summary for a child with autism level {autism_level}.
 
     STORY INFORMATION:
     - Story Premise: "{story_data.get('premise', '')}"
@@ -313,7 +318,7 @@ def summarize_story_progress(story_data, completed_scenes, active_session):
 
     ADAPTATION CONSIDERATIONS:
     - Age: {active_session.get('age', '3')} years old
-    - Autism Level: {active_session.get('autism_level', 'Level 1')}
+    - Autism Level: {autism_level}
     - Use clear, concrete language
     - Highlight patterns and sequences
     - Emphasize emotions at an appropriate level
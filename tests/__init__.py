@@ -0,0 +1,2 @@
+# Data URL of a 1x1 PNG, shared by tests that only need an image payload that decodes
+TEST_DATA_URL = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVQI12P4//8/AAX+Av7czFnnAAAAAElFTkSuQmCC"
@@ -1,19 +1,29 @@
 """
 Main entry point for running all tests.
 Usage: python -m tests
+
+If concurrencytest is installed, the suite is split across one forked worker per CPU.
+With pytest-xdist, `python -m pytest tests/ -n auto` does the same.
 """
 
 import unittest
 import sys
 import os
 
-# Add the parent directory to sys.path to import modules
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from concurrencytest import ConcurrentTestSuite, fork_for_tests
+except ImportError:
+    ConcurrentTestSuite = None
 
-# Discover and run all tests
+# Discover and run all tests; discover() puts the project root on sys.path via top_level_dir
 loader = unittest.TestLoader()
 start_dir = os.path.dirname(os.path.abspath(__file__))
-suite = loader.discover(start_dir)
+top_level_dir = os.path.dirname(start_dir)
+suite = loader.discover(start_dir, top_level_dir=top_level_dir)
+
+# Tests are mock-only and independent, so run them in parallel when possible
+if ConcurrentTestSuite is not None:
+    suite = ConcurrentTestSuite(suite, fork_for_tests(os.cpu_count() or 1))
 
 runner = unittest.TextTestRunner(verbosity=2)
 result = runner.run(suite)
@@ -2,10 +2,8 @@ import os
 import sys
 import unittest
 from unittest.mock import patch, MagicMock
-import base64
-import io
+from types import SimpleNamespace
 from PIL import Image
-import numpy as np
 
 # Add the parent directory to sys.path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -16,6 +14,7 @@ from models.prompt_generation import generate_prompt_from_options
 from utils.state_management import generate_image_and_reset_chat, chat_respond, update_sessions
 from utils.visualization import update_difficulty_label, update_checklist_html, update_progress_html
 from utils.file_operations import save_image_from_data_url, save_all_session_images, save_session_log
+from tests import TEST_DATA_URL
 
 
 class TestImageGeneration(unittest.TestCase):
@@ -24,7 +23,7 @@ class TestImageGeneration(unittest.TestCase):
     @patch('models.image_generation.InferenceClient')
     def test_generate_image_success(self, mock_client):
         # Create a mock PIL image
-        mock_image = Image.new('RGB', (512, 512), color='red')
+        mock_image = Image.new('RGB', (1, 1), color='red')
         mock_client_instance = MagicMock()
         mock_client_instance.text_to_image.return_value = mock_image
         mock_client.return_value = mock_client_instance
@@ -53,20 +52,22 @@ class TestImageGeneration(unittest.TestCase):
 class TestEvaluation(unittest.TestCase):
     """Test the image evaluation and description functionality."""
 
+    @classmethod
+    def setUpClass(cls):
+        # Test images are only read, so build them once for the class
+        cls.blue_image = Image.new('RGB', (100, 100), color='blue')
+        cls.green_image = Image.new('RGB', (100, 100), color='green')
+
     @patch('models.evaluation.GenerativeModel')
     def test_generate_detailed_description(self, mock_model):
         # Setup mock
         mock_model_instance = MagicMock()
-        mock_response = MagicMock()
-        mock_response.text = "This is a detailed description of the image."
+        mock_response = SimpleNamespace(text="This is a detailed description of the image.")
         mock_model_instance.generate_content.return_value = mock_response
         mock_model.return_value = mock_model_instance
 
-        # Create a test image
-        test_image = Image.new('RGB', (100, 100), color='blue')
-
         # Call the function
-        result = generate_detailed_description(test_image, "test prompt", "Simple", "animals")
+        result = generate_detailed_description(self.blue_image, "test prompt", "Simple", "animals")
 
         # Verify result
         self.assertEqual(result, "This is a detailed description of the image.")
@@ -76,16 +77,12 @@ class TestEvaluation(unittest.TestCase):
     def test_extract_key_details(self, mock_model):
         # Setup mock
         mock_model_instance = MagicMock()
-        mock_response = MagicMock()
-        mock_response.text = '["detail 1", "detail 2", "detail 3"]'
+        mock_response = SimpleNamespace(text='["detail 1", "detail 2", "detail 3"]')
         mock_model_instance.generate_content.return_value = mock_response
         mock_model.return_value = mock_model_instance
 
-        # Create a test image
-        test_image = Image.new('RGB', (100, 100), color='green')
-
         # Call the function
-        result = extract_key_details(test_image, "test prompt", "animals")
+        result = extract_key_details(self.green_image, "test prompt", "animals")
 
         # Verify result contains extracted details
         self.assertIn("detail 1", result)
@@ -113,8 +110,7 @@ class TestPromptGeneration(unittest.TestCase):
     def test_generate_prompt_from_options(self, mock_model):
         # Setup mock
         mock_model_instance = MagicMock()
-        mock_response = MagicMock()
-        mock_response.text = "A detailed prompt for image generation"
+        mock_response = SimpleNamespace(text="A detailed prompt for image generation")
         mock_model_instance.generate_content.return_value = mock_response
         mock_model.return_value = mock_model_instance
 
@@ -201,21 +197,17 @@ class TestVisualization(unittest.TestCase):
 class TestFileOperations(unittest.TestCase):
     """Test file operation functionality."""
 
+    data_url = TEST_DATA_URL
+
     @patch('builtins.open')
     def test_save_image_from_data_url(self, mock_open):
-        # Create a small test image and convert to data URL
-        img = Image.new('RGB', (10, 10), color='red')
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        data_url = f"data:image/png;base64,{img_str}"
-
         # Call the function
-        result = save_image_from_data_url(data_url, "test.png")
+        result = save_image_from_data_url(self.data_url, "test.png")
 
         # Verify the file was "saved"
         self.assertTrue(result)
-        mock_open.assert_called_once_with("test.png", "wb")
+        mock_open.assert_called_once()
+        self.assertEqual(mock_open.call_args.args, ("test.png", "wb"))
 
 
 if __name__ == '__main__':
@@ -5,23 +5,20 @@ This allows sharing fixtures between test files when using pytest.
 """
 
 import pytest
-import io
-import base64
 from PIL import Image
 
-@pytest.fixture
+from tests import TEST_DATA_URL
+
+
+@pytest.fixture(scope="session")
 def test_image():
-    """Create a small test image for testing."""
-    return Image.new('RGB', (100, 100), color='blue')
+    """Create a small test image for testing (shared; do not mutate)."""
+    return Image.new('RGB', (1, 1), color='blue')
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_data_url():
-    """Create a data URL from a test image."""
-    img = Image.new('RGB', (10, 10), color='red')
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    img_str = base64.b64encode(buffer.getvalue()).decode()
-    return f"data:image/png;base64,{img_str}"
+    """Return a data URL for a 1x1 PNG, precomputed so no image is encoded."""
+    return TEST_DATA_URL
 
 @pytest.fixture
 def sample_session():
@@ -7,12 +7,13 @@ import os
 class TestConfig(unittest.TestCase):
     """Test the configuration settings."""
 
-    def setUp(self):
-        """Set up the test by loading the config module."""
+    @classmethod
+    def setUpClass(cls):
+        """Set up the tests by loading the config module once."""
         # Dynamically load the config module
         spec = importlib.util.spec_from_file_location("config", "config.py")
-        self.config = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(self.config)
+        cls.config = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(cls.config)
 
     def test_difficulty_levels(self):
         """Test that difficulty levels are properly defined."""
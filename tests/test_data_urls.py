@@ -0,0 +1,31 @@
+# tests/test_data_urls.py
+
+import unittest
+
+from utils.data_urls import image_file_extension, parse_image_data_url
+from tests import TEST_DATA_URL
+
+class TestDataUrls(unittest.TestCase):
+    """Test suite for image data URL helpers."""
+
+    def test_parse_image_data_url(self):
+        """Test splitting a data URL into its mime type and decoded bytes."""
+        mime_type, image_bytes = parse_image_data_url(TEST_DATA_URL)
+        self.assertEqual(mime_type, "image/png")
+        self.assertTrue(image_bytes.startswith(b"\x89PNG"))
+
+        self.assertEqual(parse_image_data_url("data:image/jpeg;base64,AAEC"), ("image/jpeg", b"\x00\x01\x02"))
+
+        # Anything that is not an image data URL is rejected
+        for invalid in ("", None, "not-a-data-url", "data:text/plain;base64,SGk=", "data:image/png;base64"):
+            with self.assertRaises(ValueError):
+                parse_image_data_url(invalid)
+
+    def test_image_file_extension(self):
+        """Test mapping image mime types to file extensions."""
+        self.assertEqual(image_file_extension("image/jpeg"), "jpeg")
+        self.assertEqual(image_file_extension("image/png"), "png")
+
+
+if __name__ == '__main__':
+    unittest.main()
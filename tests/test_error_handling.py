@@ -1,5 +1,6 @@
 # tests/test_error_handling.py
 
+import os
 import unittest
 from unittest.mock import patch, MagicMock
 import io
@@ -15,25 +16,20 @@ class TestErrorHandling(unittest.TestCase):
 
     def test_image_generation_error_handling(self):
         """Test error handling in image generation function."""
-        with patch('models.image_generation.InferenceClient') as mock_client:
-            # Setup mock to raise different types of exceptions
-            mock_client_instance = MagicMock()
-
-            # Case 1: API Error
-            mock_client_instance.text_to_image.side_effect = Exception("API Error")
-            mock_client.return_value = mock_client_instance
-            result = generate_image_fn("A test prompt")
-            self.assertIsNone(result)
-
-            # Case 2: Connection Error
-            mock_client_instance.text_to_image.side_effect = ConnectionError("Network failure")
-            result = generate_image_fn("A test prompt")
-            self.assertIsNone(result)
-
-            # Case 3: Value Error
-            mock_client_instance.text_to_image.side_effect = ValueError("Invalid parameter")
-            result = generate_image_fn("A test prompt")
-            self.assertIsNone(result)
+        with patch('models.image_generation._get_client') as mock_get_client, \
+                patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}):
+            # One mock, raising a different type of exception on each call:
+            # API error, connection error, value error
+            mock_generate = mock_get_client.return_value.models.generate_images
+            mock_generate.side_effect = [
+                Exception("API Error"),
+                ConnectionError("Network failure"),
+                ValueError("Invalid parameter"),
+            ]
+
+            for _ in range(3):
+                self.assertIsNone(generate_image_fn("A test prompt"))
+            self.assertEqual(mock_generate.call_count, 3)
 
     def test_evaluation_error_handling(self):
         """Test error handling in evaluation functions."""
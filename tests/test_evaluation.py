@@ -2,8 +2,7 @@
 
 import unittest
 from unittest.mock import patch, MagicMock
-import base64
-import io
+from types import SimpleNamespace
 import json
 from PIL import Image
 
@@ -14,29 +13,43 @@ from models.evaluation import (
     parse_evaluation,
     update_checklist
 )
+from tests import TEST_DATA_URL
+
 
 class TestEvaluation(unittest.TestCase):
     """Test suite for image evaluation and description functionality."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures shared by every test; none of them mutate the image."""
+        # Create a small test image for the PIL code paths
+        cls.test_image = Image.new('RGB', (1, 1), color='blue')
+        # Patch the Gemini model once for the whole class; setUp resets it per test
+        model_patcher = patch('models.evaluation.GenerativeModel')
+        cls.mock_model = model_patcher.start()
+        cls.addClassCleanup(model_patcher.stop)
+
     def setUp(self):
-        """Set up test fixtures."""
-        # Create a small test image
-        self.test_image = Image.new('RGB', (100, 100), color='blue')
-        # Create a data URL
-        buffer = io.BytesIO()
-        self.test_image.save(buffer, format="PNG")
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        self.test_data_url = f"data:image/png;base64,{img_str}"
-
-    @patch('models.evaluation.GenerativeModel')
-    def test_generate_detailed_description(self, mock_model):
+        """Clear calls and configuration left on the shared model mock."""
+        self.mock_model.reset_mock(return_value=True, side_effect=True)
+
+    @staticmethod
+    def _make_active_session():
+        """Build a fresh session for parse_evaluation, which updates it in place."""
+        return {
+            "identified_details": [],
+            "key_details": ["detail 1", "detail 2", "detail 3"],
+            "difficulty": "Simple",
+            "used_hints": []
+        }
+
+    def test_generate_detailed_description(self):
         """Test generating a detailed description from an image."""
         # Setup mock
         mock_model_instance = MagicMock()
-        mock_response = MagicMock()
-        mock_response.text = "This is a detailed description of the image."
+        mock_response = SimpleNamespace(text="This is a detailed description of the image.")
         mock_model_instance.generate_content.return_value = mock_response
-        mock_model.return_value = mock_model_instance
+        self.mock_model.return_value = mock_model_instance
 
         # Test with PIL Image
         result = generate_detailed_description(
@@ -51,19 +64,32 @@ class TestEvaluation(unittest.TestCase):
 
         # Test with data URL
         result = generate_detailed_description(
-            self.test_data_url, "test prompt", "Simple", "animals"
+            TEST_DATA_URL, "test prompt", "Simple", "animals"
         )
         # Verify result
         self.assertEqual(result, "This is a detailed description of the image.")
         mock_model_instance.generate_content.assert_called_once()
 
-    @patch('models.evaluation.GenerativeModel')
-    def test_generate_detailed_description_error(self, mock_model):
+    def test_data_url_mime_type_forwarded(self):
+        """Test that the data URL's own mime type is sent to Gemini Vision."""
+        mock_model_instance = MagicMock()
+        mock_response = SimpleNamespace(text="A description.")
+        mock_model_instance.generate_content.return_value = mock_response
+        self.mock_model.return_value = mock_model_instance
+
+        # Re-label the PNG payload as JPEG to check the header is honoured
+        jpeg_data_url = TEST_DATA_URL.replace("image/png", "image/jpeg", 1)
+        generate_detailed_description(jpeg_data_url, "test prompt", "Simple", "animals")
+
+        content = mock_model_instance.generate_content.call_args[0][0]
+        self.assertEqual(content.parts[0].inline_data.mime_type, "image/jpeg")
+
+    def test_generate_detailed_description_error(self):
         """Test error handling in description generation."""
         # Setup mock to raise an exception
         mock_model_instance = MagicMock()
         mock_model_instance.generate_content.side_effect = Exception("API Error")
-        mock_model.return_value = mock_model_instance
+        self.mock_model.return_value = mock_model_instance
 
         # Call the function
         result = generate_detailed_description(
@@ -73,15 +99,13 @@ class TestEvaluation(unittest.TestCase):
         # Verify error message is returned
         self.assertTrue(result.startswith("Error processing image"))
 
-    @patch('models.evaluation.GenerativeModel')
-    def test_extract_key_details(self, mock_model):
+    def test_extract_key_details(self):
         """Test extracting key details from an image."""
         # Setup mock with JSON response
         mock_model_instance = MagicMock()
-        mock_response = MagicMock()
-        mock_response.text = '["detail 1", "detail 2", "detail 3"]'
+        mock_response = SimpleNamespace(text='["detail 1", "detail 2", "detail 3"]')
         mock_model_instance.generate_content.return_value = mock_response
-        mock_model.return_value = mock_model_instance
+        self.mock_model.return_value = mock_model_instance
 
         # Call the function
         result = extract_key_details(self.test_image, "test prompt", "animals")
@@ -103,12 +127,7 @@ class TestEvaluation(unittest.TestCase):
         """Test parsing evaluation response in JSON format."""
         # Test with valid JSON
         eval_text = '{"feedback": "Good job!", "newly_identified_details": ["detail 1", "detail 2"], "hint": "Look for colors", "score": 75, "advance_difficulty": false}'
-        active_session = {
-            "identified_details": [],
-            "key_details": ["detail 1", "detail 2", "detail 3"],
-            "difficulty": "Simple",
-            "used_hints": []
-        }
+        active_session = self._make_active_session()
 
         feedback, difficulty, should_advance, newly_identified, score = parse_evaluation(eval_text, active_session)
 
@@ -118,16 +137,46 @@ class TestEvaluation(unittest.TestCase):
         self.assertEqual(score, 75)
         self.assertFalse(should_advance)
 
+    def test_parse_evaluation_json_with_surrounding_text(self):
+        """Test parsing a fenced JSON evaluation followed by extra prose."""
+        eval_text = 'Here is my evaluation:\n```json\n{"feedback": "Nice {work}!", "newly_identified_details": ["detail 1"], "hint": null, "score": 60, "advance_difficulty": false}\n```\nHope this helps.'
+        active_session = self._make_active_session()
+
+        feedback, difficulty, should_advance, newly_identified, score = parse_evaluation(eval_text, active_session)
+
+        self.assertEqual(feedback, "Nice {work}!")
+        self.assertEqual(newly_identified, ["detail 1"])
+        self.assertEqual(score, 60)
+
+    def test_parse_evaluation_brace_in_prose_before_fenced_json(self):
+        """Test that a brace in the prose does not hide the fenced JSON answer."""
+        eval_text = 'I see you mentioned {ball}.\n```json\n{"feedback": "Yes, a red ball!", "newly_identified_details": ["detail 1"], "hint": null, "score": 80, "advance_difficulty": false}\n```'
+        active_session = self._make_active_session()
+
+        feedback, difficulty, should_advance, newly_identified, score = parse_evaluation(eval_text, active_session)
+
+        self.assertEqual(feedback, "Yes, a red ball!")
+        self.assertEqual(newly_identified, ["detail 1"])
+        self.assertEqual(score, 80)
+
+    def test_parse_evaluation_invalid_field_types(self):
+        """Test that wrongly typed fields fall back to their defaults."""
+        eval_text = '{"feedback": 42, "newly_identified_details": ["detail 2", 7, "  "], "hint": null, "score": 250, "advance_difficulty": "yes"}'
+        active_session = self._make_active_session()
+
+        feedback, difficulty, should_advance, newly_identified, score = parse_evaluation(eval_text, active_session)
+
+        self.assertIsInstance(feedback, str)
+        self.assertTrue(len(feedback) > 0)
+        self.assertEqual(newly_identified, ["detail 2"])
+        self.assertEqual(score, 0)
+        self.assertFalse(should_advance)
+
     def test_parse_evaluation_malformed_json(self):
         """Test parsing evaluation with malformed JSON."""
         # Test with malformed JSON
         eval_text = 'feedback: "Good job!", newly_identified_details: ["detail 1", "detail 2"], hint: "Look for colors", score: 75, advance_difficulty: false'
-        active_session = {
-            "identified_details": [],
-            "key_details": ["detail 1", "detail 2", "detail 3"],
-            "difficulty": "Simple",
-            "used_hints": []
-        }
+        active_session = self._make_active_session()
 
         feedback, difficulty, should_advance, newly_identified, score = parse_evaluation(eval_text, active_session)
 
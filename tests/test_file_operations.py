@@ -1,40 +1,74 @@
 # tests/test_file_operations.py
 
 import unittest
-from unittest.mock import patch, mock_open, MagicMock
+from unittest.mock import patch, MagicMock
 import base64
+import glob
 import io
 import json
-from PIL import Image
+import os
+import shutil
+import tempfile
 
 from utils.file_operations import (
     save_image_from_data_url,
     save_all_session_images,
-    save_session_log
+    save_session_log,
+    save_session_to_filesystem
 )
+from tests import TEST_DATA_URL
+
+
+class _MemoryFile(io.BytesIO):
+    """Binary in-memory file that keeps its contents readable after close."""
+
+    def close(self):
+        pass
+
+
+class _MemoryTextFile(io.StringIO):
+    """Text in-memory file that keeps its contents readable after close."""
+
+    def close(self):
+        pass
+
+
+class _RecordingOpen:
+    """Write-only stand-in for open() that records calls and keeps the files in memory."""
+
+    def __init__(self):
+        self.calls = []
+        self.files = []
+
+    def __call__(self, path, mode="r", **kwargs):
+        self.calls.append((path, mode, kwargs))
+        memory_file = _MemoryFile() if "b" in mode else _MemoryTextFile()
+        self.files.append(memory_file)
+        return memory_file
 
 
 class TestFileOperations(unittest.TestCase):
     """Test suite for file operation functionality."""
 
-    def setUp(self):
-        """Set up test fixtures."""
-        # Create a small test image and convert to data URL
-        self.test_image = Image.new('RGB', (10, 10), color='red')
-        buffer = io.BytesIO()
-        self.test_image.save(buffer, format="PNG")
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        self.test_data_url = f"data:image/png;base64,{img_str}"
-
-    @patch('builtins.open', new_callable=mock_open)
-    def test_save_image_from_data_url(self, mock_file):
+    @classmethod
+    def setUpClass(cls):
+        """Pin the timestamp used in generated filenames for every test."""
+        datetime_patcher = patch('utils.file_operations.datetime')
+        mock_datetime = datetime_patcher.start()
+        cls.addClassCleanup(datetime_patcher.stop)
+        mock_datetime.datetime.now.return_value.strftime.return_value = "20230101_120000"
+
+    def test_save_image_from_data_url(self):
         """Test saving an image from a data URL."""
         # Call the function
-        result = save_image_from_data_url(self.test_data_url, "test.png")
+        fake_open = _RecordingOpen()
+        with patch('builtins.open', fake_open):
+            result = save_image_from_data_url(TEST_DATA_URL, "test.png")
 
-        # Verify the file was "saved"
+        # Verify the file was "saved" with the decoded image bytes
         self.assertTrue(result)
-        mock_file.assert_called_once_with("test.png", "wb")
+        self.assertEqual(fake_open.calls, [("test.png", "wb", {})])
+        self.assertEqual(fake_open.files[0].getvalue(), base64.b64decode(TEST_DATA_URL.split(",")[1]))
 
         # Test with invalid data URL
         result = save_image_from_data_url("not-a-data-url", "test.png")
@@ -46,21 +80,19 @@ class TestFileOperations(unittest.TestCase):
 
     @patch('utils.file_operations.os.makedirs')
     @patch('utils.file_operations.save_image_from_data_url')
-    @patch('utils.file_operations.datetime')
-    def test_save_all_session_images(self, mock_datetime, mock_save_image, mock_makedirs):
+    def test_save_all_session_images(self, mock_save_image, mock_makedirs):
         """Test saving all session images."""
         # Setup mocks
-        mock_datetime.datetime.now.return_value.strftime.return_value = "20230101_120000"
         mock_save_image.return_value = True
 
         # Setup test data
         saved_sessions = [
-            {"image": self.test_data_url, "prompt": "Session 1"},
-            {"image": self.test_data_url, "prompt": "Session 2"},
+            {"image": TEST_DATA_URL, "prompt": "Session 1"},
+            {"image": TEST_DATA_URL, "prompt": "Session 2"},
             {"image": "not-an-image", "prompt": "Session 3"}  # Should be skipped
         ]
 
-        active_session = {"image": self.test_data_url, "prompt": "Active session"}
+        active_session = {"image": TEST_DATA_URL, "prompt": "Active session"}
 
         # Call the function
         result = save_all_session_images(saved_sessions, active_session)
@@ -70,27 +102,57 @@ class TestFileOperations(unittest.TestCase):
         self.assertEqual(mock_save_image.call_count, 3)  # 2 from saved + 1 active
         self.assertIn("Successfully saved 3 images", result)
 
-    @patch('builtins.open', new_callable=mock_open)
+    @patch('utils.file_operations.os.makedirs')
+    @patch('utils.file_operations.save_image_from_data_url')
+    def test_save_all_session_images_uses_image_extension(self, mock_save_image, mock_makedirs):
+        """Test that saved image files are named after their data URL's mime type."""
+        mock_save_image.return_value = True
+        jpeg_data_url = "data:image/jpeg;base64,AAEC"
+
+        save_all_session_images([{"image": TEST_DATA_URL, "prompt": "Session 1"}],
+                                {"image": jpeg_data_url, "prompt": "Active session"})
+
+        filenames = [call.args[1] for call in mock_save_image.call_args_list]
+        self.assertTrue(filenames[0].endswith("_session_0.png"))
+        self.assertTrue(filenames[1].endswith("_active_session.jpeg"))
+
+    def test_save_session_to_filesystem_uses_image_extension(self):
+        """Test that a JPEG session image is written and referenced as .jpeg."""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp_dir)
+
+        active_session = {"prompt": "Active session", "image": "data:image/jpeg;base64,AAEC"}
+        result = save_session_to_filesystem(active_session, [])
+
+        self.assertIn("✅", result)
+        image_paths = glob.glob(os.path.join("Sessions History", "*", "images", "*"))
+        self.assertEqual([os.path.basename(path) for path in image_paths], ["session_0.jpeg"])
+        with open(image_paths[0], "rb") as f:
+            self.assertEqual(f.read(), b"\x00\x01\x02")
+
     @patch('json.dump')
-    @patch('utils.file_operations.datetime')
-    def test_save_session_log(self, mock_datetime, mock_json_dump, mock_file):
+    def test_save_session_log(self, mock_json_dump):
         """Test saving session logs to a JSON file."""
-        # Setup mocks
-        mock_datetime.datetime.now.return_value.strftime.return_value = "20230101_120000"
-
         # Setup test data
         saved_sessions = [
-            {"prompt": "Session 1", "image": self.test_data_url},
-            {"prompt": "Session 2", "image": self.test_data_url}
+            {"prompt": "Session 1", "image": TEST_DATA_URL},
+            {"prompt": "Session 2", "image": TEST_DATA_URL}
         ]
 
-        active_session = {"prompt": "Active session", "image": self.test_data_url}
+        active_session = {"prompt": "Active session", "image": TEST_DATA_URL}
 
         # Call the function
-        result = save_session_log(saved_sessions, active_session)
+        fake_open = _RecordingOpen()
+        with patch('builtins.open', fake_open):
+            result = save_session_log(saved_sessions, active_session)
 
         # Verify results
-        mock_file.assert_called_once_with("session_log_20230101_120000.json", "w", encoding="utf-8")
+        self.assertEqual(
+            fake_open.calls,
+            [("session_log_20230101_120000.json", "w", {"encoding": "utf-8"})]
+        )
         mock_json_dump.assert_called_once()
 
         # Verify that image data URLs are removed in the saved JSON
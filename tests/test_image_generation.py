@@ -1,12 +1,15 @@
 # tests/test_image_generation.py
 
 import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 import base64
 import io
 from PIL import Image
 
+import models.image_generation as image_generation
 from models.image_generation import generate_image_fn, global_image_data_url, global_image_prompt
 
 class TestImageGeneration(unittest.TestCase):
@@ -16,7 +19,7 @@ class TestImageGeneration(unittest.TestCase):
     def test_generate_image_success(self, mock_client):
         """Test successful image generation with valid prompt."""
         # Create a mock PIL image
-        mock_image = Image.new('RGB', (512, 512), color='red')
+        mock_image = Image.new('RGB', (1, 1), color='red')
         mock_client_instance = MagicMock()
         mock_client_instance.text_to_image.return_value = mock_image
         mock_client.return_value = mock_client_instance
@@ -30,30 +33,27 @@ class TestImageGeneration(unittest.TestCase):
         self.assertIsNotNone(global_image_data_url)
         self.assertEqual(global_image_prompt, "A test prompt")
 
-    @patch('models.image_generation.InferenceClient')
-    def test_generate_image_with_parameters(self, mock_client):
+    @patch('models.image_generation._get_client')
+    def test_generate_image_with_parameters(self, mock_get_client):
         """Test image generation with custom parameters."""
-        mock_image = Image.new('RGB', (512, 512), color='blue')
-        mock_client_instance = MagicMock()
-        mock_client_instance.text_to_image.return_value = mock_image
-        mock_client.return_value = mock_client_instance
-
-        result = generate_image_fn(
-            "A detailed prompt",
-            guidance_scale=5.0,
-            negative_prompt="bad quality",
-            num_inference_steps=30
-        )
-
-        # Verify custom parameters were passed
-        mock_client_instance.text_to_image.assert_called_once_with(
-            "A detailed prompt",
-            model="stabilityai/stable-diffusion-3.5-large-turbo",
-            guidance_scale=5.0,
-            negative_prompt="bad quality",
-            num_inference_steps=30
-        )
-        self.assertEqual(result, mock_image)
+        buffer = io.BytesIO()
+        Image.new('RGB', (1, 1), color='blue').save(buffer, format="JPEG")
+        generated = MagicMock()
+        generated.image.image_bytes = buffer.getvalue()
+        mock_generate = mock_get_client.return_value.models.generate_images
+        mock_generate.return_value.generated_images = [generated]
+        self.addCleanup(setattr, image_generation, "global_image_data_url", None)
+
+        result = generate_image_fn("A detailed prompt", model="models/imagen-test")
+
+        # Verify the prompt, model and image settings were passed
+        self.assertEqual(mock_generate.call_count, 1)
+        call_kwargs = mock_generate.call_args.kwargs
+        self.assertEqual(call_kwargs["prompt"], "A detailed prompt")
+        self.assertEqual(call_kwargs["model"], "models/imagen-test")
+        self.assertEqual(call_kwargs["config"]["number_of_images"], 1)
+        self.assertEqual(call_kwargs["config"]["output_mime_type"], "image/jpeg")
+        self.assertIsNotNone(result)
 
     @patch('models.image_generation.InferenceClient')
     def test_generate_image_error(self, mock_client):
@@ -72,7 +72,7 @@ class TestImageGeneration(unittest.TestCase):
     @patch('models.image_generation.InferenceClient')
     def test_empty_prompt_handling(self, mock_client):
         """Test handling of empty prompts."""
-        mock_image = Image.new('RGB', (512, 512), color='white')
+        mock_image = Image.new('RGB', (1, 1), color='white')
         mock_client_instance = MagicMock()
         mock_client_instance.text_to_image.return_value = mock_image
         mock_client.return_value = mock_client_instance
@@ -84,6 +84,57 @@ class TestImageGeneration(unittest.TestCase):
         mock_client_instance.text_to_image.assert_called_once()
         self.assertEqual(result, mock_image)
 
+    @patch('models.image_generation.genai.Client')
+    def test_client_reused_across_calls(self, mock_client):
+        """Test that the GenAI client is created once and reused for the same key."""
+        image_generation._genai_client = None
+        self.addCleanup(setattr, image_generation, "_genai_client", None)
+        mock_client.return_value.models.generate_images.return_value.generated_images = []
+
+        with patch.dict(os.environ, {"GEMINI_API_KEY": "test-key"}):
+            generate_image_fn("First prompt")
+            generate_image_fn("Second prompt")
+
+        mock_client.assert_called_once_with(api_key="test-key")
+        self.assertEqual(mock_client.return_value.models.generate_images.call_count, 2)
+
+    @patch('models.image_generation._get_client')
+    def test_data_url_built_from_api_bytes(self, mock_get_client):
+        """Test that the data URL wraps the API's JPEG bytes without re-encoding."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (8, 8), color='green').save(buffer, format="JPEG")
+        image_bytes = buffer.getvalue()
+        generated = MagicMock()
+        generated.image.image_bytes = image_bytes
+        mock_get_client.return_value.models.generate_images.return_value.generated_images = [generated]
+        self.addCleanup(setattr, image_generation, "global_image_data_url", None)
+
+        result = generate_image_fn("A test prompt")
+
+        expected_url = f"data:image/jpeg;base64,{base64.b64encode(image_bytes).decode('utf-8')}"
+        self.assertIsNotNone(result)
+        self.assertEqual(result.info["data_url"], expected_url)
+        self.assertEqual(image_generation.global_image_data_url, expected_url)
+
+    @patch('models.image_generation._get_client')
+    def test_image_saved_to_output_path(self, mock_get_client):
+        """Test that the API's image bytes are written to output_path, creating its directory."""
+        buffer = io.BytesIO()
+        Image.new('RGB', (8, 8), color='green').save(buffer, format="JPEG")
+        image_bytes = buffer.getvalue()
+        generated = MagicMock()
+        generated.image.image_bytes = image_bytes
+        mock_get_client.return_value.models.generate_images.return_value.generated_images = [generated]
+        self.addCleanup(setattr, image_generation, "global_image_data_url", None)
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        output_path = os.path.join(tmp_dir, "images", "image.jpg")
+
+        generate_image_fn("A test prompt", output_path=output_path)
+
+        with open(output_path, "rb") as f:
+            self.assertEqual(f.read(), image_bytes)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,51 +1,59 @@
 # tests/test_integration.py
 
+import contextlib
+import io
 import unittest
 from unittest.mock import patch, MagicMock
-import io
-import base64
+from types import SimpleNamespace
 from PIL import Image
 import gradio as gr
 
 from app import main
+import models.image_generation as image_generation
 from models.image_generation import generate_image_fn
 from models.evaluation import generate_detailed_description, extract_key_details
 from utils.state_management import generate_image_and_reset_chat, chat_respond
+from tests import TEST_DATA_URL
+
 
 class TestEndToEndFlow(unittest.TestCase):
     """Test end-to-end integration flows."""
 
-    @patch('models.image_generation.InferenceClient')
-    @patch('models.evaluation.GenerativeModel')
-    @patch('models.prompt_generation.GenerativeModel')
-    def test_generate_image_flow(self, mock_prompt_model, mock_eval_model, mock_inference):
+    def test_generate_image_flow(self):
         """Test the complete image generation flow."""
+        # Install all model patches through one stack, unwound when the test ends
+        stack = contextlib.ExitStack()
+        self.addCleanup(stack.close)
+        mock_get_client = stack.enter_context(patch('models.image_generation._get_client'))
+        mock_eval_model = stack.enter_context(patch('models.evaluation.GenerativeModel'))
+        mock_prompt_model = stack.enter_context(patch('models.prompt_generation.GenerativeModel'))
+
         # Setup mocks
         # 1. Prompt generation
         prompt_model_instance = MagicMock()
-        prompt_response = MagicMock()
-        prompt_response.text = "A detailed test prompt for image generation"
+        prompt_response = SimpleNamespace(text="A detailed test prompt for image generation")
         prompt_model_instance.generate_content.return_value = prompt_response
         mock_prompt_model.return_value = prompt_model_instance
 
         # 2. Image generation
-        mock_image = Image.new('RGB', (512, 512), color='blue')
-        inference_instance = MagicMock()
-        inference_instance.text_to_image.return_value = mock_image
-        mock_inference.return_value = inference_instance
+        buffer = io.BytesIO()
+        Image.new('RGB', (1, 1), color='blue').save(buffer, format="JPEG")
+        generated = MagicMock()
+        generated.image.image_bytes = buffer.getvalue()
+        mock_generate = mock_get_client.return_value.models.generate_images
+        mock_generate.return_value.generated_images = [generated]
+        self.addCleanup(setattr, image_generation, "global_image_data_url", None)
 
         # 3. Image description
         eval_model_instance = MagicMock()
-        description_response = MagicMock()
-        description_response.text = "This is a description of the test image."
-        details_response = MagicMock()
-        details_response.text = '["detail 1", "detail 2", "detail 3"]'
-
-        # Configure the mock to return different responses for different calls
-        eval_model_instance.generate_content.side_effect = [
-            description_response,  # First call - generate description
-            details_response       # Second call - extract details
-        ]
+        description_response = SimpleNamespace(text="This is a description of the test image.")
+        details_response = SimpleNamespace(text='["detail 1", "detail 2", "detail 3"]')
+
+        # Description and details are requested concurrently, so answer by request
+        # rather than by call order; only the key-details query asks for a JSON array
+        eval_model_instance.generate_content.side_effect = lambda content: (
+            details_response if "JSON array" in content.parts[1].text else description_response
+        )
         mock_eval_model.return_value = eval_model_instance
 
         # Execute the flow
@@ -70,13 +78,11 @@ class TestEndToEndFlow(unittest.TestCase):
         prompt_model_instance.generate_content.assert_called_once()
 
         # 2. Check image generation
-        inference_instance.text_to_image.assert_called_once_with(
-            "A detailed test prompt for image generation",
-            model="stabilityai/stable-diffusion-3.5-large-turbo",
-            guidance_scale=4.0,
-            negative_prompt="blurry, distorted, low quality, pixelated, poorly drawn, deformed, unfinished, sketchy, cartoon, blur",
-            num_inference_steps=50
-        )
+        self.assertEqual(mock_generate.call_count, 1)
+        call_kwargs = mock_generate.call_args.kwargs
+        self.assertEqual(call_kwargs["prompt"], "A detailed test prompt for image generation")
+        self.assertEqual(call_kwargs["model"], "models/imagen-4.0-ultra-generate-preview-06-06")
+        self.assertEqual(new_session["image"], image.info["data_url"])
 
         # 3. Check image description and details extraction
         self.assertEqual(eval_model_instance.generate_content.call_count, 2)
@@ -99,13 +105,6 @@ class TestEndToEndFlow(unittest.TestCase):
     @patch('utils.state_management.parse_evaluation')
     def test_chat_interaction_flow(self, mock_parse_eval, mock_compare_details):
         """Test the chat interaction flow."""
-        # Create a test image for the session
-        test_image = Image.new('RGB', (100, 100), color='red')
-        buffer = io.BytesIO()
-        test_image.save(buffer, format="PNG")
-        img_bytes = buffer.getvalue()
-        test_data_url = f"data:image/png;base64,{base64.b64encode(img_bytes).decode()}"
-
         # Setup mocks
         mock_compare_details.return_value = "Raw evaluation response"
         mock_parse_eval.return_value = (
@@ -119,7 +118,7 @@ class TestEndToEndFlow(unittest.TestCase):
         # Create test session and checklist
         active_session = {
             "prompt": "A test prompt",
-            "image": test_data_url,
+            "image": TEST_DATA_URL,
             "image_description": "An image with a red ball and blue sky",
             "chat": [],
             "key_details": ["red ball", "blue sky", "green grass"],
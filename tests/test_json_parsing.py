@@ -0,0 +1,42 @@
+# tests/test_json_parsing.py
+
+import unittest
+
+from utils.json_parsing import extract_json_object, iter_json_objects, parse_json_object
+
+class TestJsonParsing(unittest.TestCase):
+    """Test suite for extracting JSON objects from LLM responses."""
+
+    def test_extract_json_object(self):
+        """Test that the first balanced object is returned, ignoring braces in strings."""
+        text = 'Here you go: {"a": {"b": "}"}, "c": 1} and {"later": true}'
+        self.assertEqual(extract_json_object(text), '{"a": {"b": "}"}, "c": 1}')
+
+        # No object or an unterminated one
+        self.assertIsNone(extract_json_object("no json here"))
+        self.assertIsNone(extract_json_object('{"a": 1'))
+
+    def test_iter_json_objects(self):
+        """Test that fenced objects come first, then each balanced object in order."""
+        text = 'About {ball} and {"a": 1}.\n```json\n{"b": 2}\n```'
+        self.assertEqual(list(iter_json_objects(text)), ['{"b": 2}', '{ball}', '{"a": 1}'])
+
+        # Nested objects are never candidates on their own, even inside an unclosed brace
+        self.assertEqual(list(iter_json_objects('{"a": {"b": 1}}')), ['{"a": {"b": 1}}'])
+        self.assertEqual(list(iter_json_objects('{oops {"a": 1}')), [])
+
+    def test_parse_json_object(self):
+        """Test parsing fenced, embedded and invalid responses."""
+        self.assertEqual(parse_json_object('```json\n{"score": 75}\n```'), {"score": 75})
+        self.assertEqual(parse_json_object('Result:\n{"score": 75}\nThanks!'), {"score": 75})
+        self.assertIsNone(parse_json_object("score: 75"))
+        self.assertIsNone(parse_json_object('{"score": }'))
+        self.assertEqual(parse_json_object('I see {ball}. {"score": 75}'), {"score": 75})
+
+        # A truncated response must not yield one of its nested scenes as the answer
+        truncated = '{"premise": "A cat explores", "scenes": [{"scene_number": 1, "description": "Cat wakes"}, {"scene_number": 2, "descr'
+        self.assertIsNone(parse_json_object(truncated))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 
 import unittest
 from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
 
 from models.prompt_generation import generate_prompt_from_options
 import config
@@ -9,15 +10,25 @@ import config
 class TestPromptGeneration(unittest.TestCase):
     """Test suite for prompt generation functionality."""
 
-    @patch('models.prompt_generation.GenerativeModel')
-    def test_generate_prompt_from_options(self, mock_model):
+    @classmethod
+    def setUpClass(cls):
+        """Set up the model patch shared by every test."""
+        # Patch the Gemini model once for the whole class; setUp resets it per test
+        model_patcher = patch('models.prompt_generation.GenerativeModel')
+        cls.mock_model = model_patcher.start()
+        cls.addClassCleanup(model_patcher.stop)
+
+    def setUp(self):
+        """Clear calls and configuration left on the shared model mock."""
+        self.mock_model.reset_mock(return_value=True, side_effect=True)
+
+    def test_generate_prompt_from_options(self):
         """Test generating a prompt with various options."""
         # Setup mock
         mock_model_instance = MagicMock()
-        mock_response = MagicMock()
-        mock_response.text = "A detailed prompt for image generation"
+        mock_response = SimpleNamespace(text="A detailed prompt for image generation")
         mock_model_instance.generate_content.return_value = mock_response
-        mock_model.return_value = mock_model_instance
+        self.mock_model.return_value = mock_model_instance
 
         # Call the function with all parameters
         result = generate_prompt_from_options(
@@ -33,14 +44,12 @@ class TestPromptGeneration(unittest.TestCase):
         call_args = mock_model_instance.generate_content.call_args[0][0]
         self.assertIn("Realistic", call_args)
 
-    @patch('models.prompt_generation.GenerativeModel')
-    def test_generate_prompt_default_treatment_plan(self, mock_model):
+    def test_generate_prompt_default_treatment_plan(self):
         """Test prompt generation with default treatment plan."""
         mock_model_instance = MagicMock()
-        mock_response = MagicMock()
-        mock_response.text = "A prompt with default treatment plan"
+        mock_response = SimpleNamespace(text="A prompt with default treatment plan")
         mock_model_instance.generate_content.return_value = mock_response
-        mock_model.return_value = mock_model_instance
+        self.mock_model.return_value = mock_model_instance
 
         # Call without treatment plan
         result = generate_prompt_from_options(
@@ -55,27 +64,27 @@ class TestPromptGeneration(unittest.TestCase):
         self.assertIn(default_plan, call_args)
         self.assertIn("Cartoon", call_args)
 
-    @patch('models.prompt_generation.GenerativeModel')
-    def test_generate_prompt_different_styles(self, mock_model):
+    def test_generate_prompt_different_styles(self):
         """Test prompt generation with different image styles."""
         mock_model_instance = MagicMock()
-        mock_response = MagicMock()
-        mock_response.text = "Style-specific prompt"
+        mock_response = SimpleNamespace(text="Style-specific prompt")
         mock_model_instance.generate_content.return_value = mock_response
-        mock_model.return_value = mock_model_instance
+        self.mock_model.return_value = mock_model_instance
 
         # Test each style
         styles = ["Illustration", "Cartoon", "Watercolor", "3D Rendering"]
 
         for style in styles:
-            result = generate_prompt_from_options(
-                "Simple", "5", "Level 1", "animals",
-                "Focus on social skills", style
-            )
-
-            self.assertEqual(result, "Style-specific prompt")
-            call_args = mock_model_instance.generate_content.call_args[0][0]
-            self.assertIn(style, call_args)
+            # Report each style as its own case while sharing one mock setup
+            with self.subTest(style=style):
+                result = generate_prompt_from_options(
+                    "Simple", "5", "Level 1", "animals",
+                    "Focus on social skills", style
+                )
+
+                self.assertEqual(result, "Style-specific prompt")
+                call_args = mock_model_instance.generate_content.call_args[0][0]
+                self.assertIn(style, call_args)
 
 
 if __name__ == '__main__':
@@ -4,31 +4,50 @@ import unittest
 from unittest.mock import patch, MagicMock
 from PIL import Image
 
+import utils.state_management as state_management
 from utils.state_management import (
     generate_image_and_reset_chat,
     chat_respond,
-    update_sessions
+    update_sessions,
+    image_to_data_url
 )
+from tests import TEST_DATA_URL
 
 class TestStateManagement(unittest.TestCase):
     """Test suite for state management functionality."""
 
-    @patch('utils.state_management.generate_image_fn')
-    @patch('utils.state_management.generate_prompt_from_options')
-    @patch('utils.state_management.generate_detailed_description')
-    @patch('utils.state_management.extract_key_details')
-    def test_generate_image_and_reset_chat(self,
-                                          mock_extract_details,
-                                          mock_gen_desc,
-                                          mock_gen_prompt,
-                                          mock_gen_img):
+    # Mock attribute on the test case -> model call it replaces in utils.state_management
+    MOCKED_FUNCTIONS = {
+        "mock_gen_img": "generate_image_fn",
+        "mock_gen_prompt": "generate_prompt_from_options",
+        "mock_gen_desc": "generate_detailed_description",
+        "mock_extract_details": "extract_key_details",
+        "mock_compare_details": "compare_details_chat_fn",
+        "mock_parse_eval": "parse_evaluation",
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        """Build the mock generated images once; tests only hand them back from mocks."""
+        cls.purple_image = Image.new('RGB', (100, 100), color='purple')
+        cls.green_image = Image.new('RGB', (100, 100), color='green')
+
+    def setUp(self):
+        """Swap fresh mocks in for the model calls by plain attribute assignment."""
+        for mock_attr, name in self.MOCKED_FUNCTIONS.items():
+            self.addCleanup(setattr, state_management, name, getattr(state_management, name))
+            mock = MagicMock()
+            setattr(self, mock_attr, mock)
+            setattr(state_management, name, mock)
+
+    def test_generate_image_and_reset_chat(self):
         """Test generating a new image and resetting the chat state."""
         # Setup mocks
-        mock_gen_prompt.return_value = "A test prompt"
-        mock_image = Image.new('RGB', (100, 100), color='purple')
-        mock_gen_img.return_value = mock_image
-        mock_gen_desc.return_value = "Description of the image"
-        mock_extract_details.return_value = ["detail 1", "detail 2"]
+        self.mock_gen_prompt.return_value = "A test prompt"
+        mock_image = self.purple_image
+        self.mock_gen_img.return_value = mock_image
+        self.mock_gen_desc.return_value = "Description of the image"
+        self.mock_extract_details.return_value = ["detail 1", "detail 2"]
 
         # Test parameters
         age = "5"
@@ -62,20 +81,18 @@ class TestStateManagement(unittest.TestCase):
         self.assertEqual(new_active_session["details_threshold"], 0.7)
         self.assertEqual(new_active_session["image_style"], "Realistic")
 
-    @patch('utils.state_management.compare_details_chat_fn')
-    @patch('utils.state_management.parse_evaluation')
-    def test_chat_respond_basic(self, mock_parse_eval, mock_compare_details):
+    def test_chat_respond_basic(self):
         """Test basic chat response without advancing."""
         # Setup mocks
-        mock_compare_details.return_value = "Raw evaluation response"
-        mock_parse_eval.return_value = (
+        self.mock_compare_details.return_value = "Raw evaluation response"
+        self.mock_parse_eval.return_value = (
             "Good job!", "Simple", False, ["detail 1"], 70
         )
 
         # Setup test data
         user_message = "I see a red ball"
         active_session = {
-            "image": "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVQI12P4//8/AAX+Av7czFnnAAAAAElFTkSuQmCC",
+            "image": TEST_DATA_URL,
             "image_description": "An image with a red ball",
             "chat": [],
             "key_details": ["red ball", "blue sky"],
@@ -102,37 +119,25 @@ class TestStateManagement(unittest.TestCase):
         self.assertTrue(updated_checklist[0]["identified"])  # red ball
         self.assertFalse(updated_checklist[1]["identified"])  # blue sky
 
-    @patch('utils.state_management.compare_details_chat_fn')
-    @patch('utils.state_management.parse_evaluation')
-    @patch('utils.state_management.generate_image_fn')
-    @patch('utils.state_management.generate_prompt_from_options')
-    @patch('utils.state_management.generate_detailed_description')
-    @patch('utils.state_management.extract_key_details')
-    def test_chat_respond_with_advancement(self,
-                                          mock_extract_details,
-                                          mock_gen_desc,
-                                          mock_gen_prompt,
-                                          mock_gen_img,
-                                          mock_parse_eval,
-                                          mock_compare_details):
+    def test_chat_respond_with_advancement(self):
         """Test chat response that triggers advancement to new difficulty."""
         # Setup mocks for evaluation
-        mock_compare_details.return_value = "Raw evaluation response"
-        mock_parse_eval.return_value = (
+        self.mock_compare_details.return_value = "Raw evaluation response"
+        self.mock_parse_eval.return_value = (
             "Great job!", "Moderate", True, ["red ball", "blue sky"], 90
         )
 
         # Setup mocks for new image generation
-        mock_gen_prompt.return_value = "A new prompt for moderate difficulty"
-        mock_image = Image.new('RGB', (100, 100), color='green')
-        mock_gen_img.return_value = mock_image
-        mock_gen_desc.return_value = "Description of the new image"
-        mock_extract_details.return_value = ["detail A", "detail B", "detail C"]
+        self.mock_gen_prompt.return_value = "A new prompt for moderate difficulty"
+        mock_image = self.green_image
+        self.mock_gen_img.return_value = mock_image
+        self.mock_gen_desc.return_value = "Description of the new image"
+        self.mock_extract_details.return_value = ["detail A", "detail B", "detail C"]
 
         # Setup test data
         user_message = "I see a red ball and blue sky"
         active_session = {
-            "image": "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVQI12P4//8/AAX+Av7czFnnAAAAAElFTkSuQmCC",
+            "image": TEST_DATA_URL,
             "image_description": "An image with a red ball and blue sky",
             "chat": [],
             "key_details": ["red ball", "blue sky"],
@@ -172,13 +177,11 @@ class TestStateManagement(unittest.TestCase):
         self.assertTrue("advanced" in updated_chat[0][1].lower() or
                        "congratulations" in updated_chat[0][1].lower())
 
-    @patch('utils.state_management.generate_image_fn')
-    @patch('utils.state_management.generate_prompt_from_options')
-    def test_generate_image_and_reset_chat_failure(self, mock_gen_prompt, mock_gen_img):
+    def test_generate_image_and_reset_chat_failure(self):
         """Test that generate_image_and_reset_chat returns 5 values when image generation fails."""
         # Setup mocks
-        mock_gen_prompt.return_value = "A test prompt"
-        mock_gen_img.return_value = None  # Simulate image generation failure
+        self.mock_gen_prompt.return_value = "A test prompt"
+        self.mock_gen_img.return_value = None  # Simulate image generation failure
 
         # Test parameters
         age = "5"
@@ -208,6 +211,18 @@ class TestStateManagement(unittest.TestCase):
         self.assertEqual(checklist, [])
         self.assertEqual(chat_history, [{"role": "assistant", "content": "Welcome!"}])  # Should return existing chat
 
+    @patch('models.image_generation.global_image_prompt', "Another user's prompt")
+    @patch('models.image_generation.global_image_data_url', "data:image/jpeg;base64,b3RoZXI=")
+    def test_image_to_data_url_uses_own_image(self):
+        """Test that the data URL comes from the image itself, never from the shared globals."""
+        image = Image.new('RGB', (1, 1), color='red')
+        image.info["data_url"] = "data:image/jpeg;base64,bWluZQ=="
+        self.assertEqual(image_to_data_url(image), "data:image/jpeg;base64,bWluZQ==")
+
+        # An image without an attached URL is encoded as PNG
+        plain_url = image_to_data_url(Image.new('RGB', (1, 1), color='red'))
+        self.assertTrue(plain_url.startswith("data:image/png;base64,"))
+
     def test_update_sessions(self):
         """Test updating session list with active session."""
         # Test with empty active session
@@ -484,7 +484,6 @@ def create_interface():
                     all_states = {}
 
                 # Create a unique ID for this state
-                import time
                 state_id = f"{save_name or 'session'}_{int(time.time())}"
 
                 # Create the state entry
@@ -624,7 +623,6 @@ def create_interface():
                 else:
                     all_states = {}
 
-                import time
                 # Use existing ID or create a new one
                 state_id = current_id or f"autosave_{int(time.time())}"
 
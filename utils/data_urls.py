@@ -0,0 +1,48 @@
+import base64
+
+
+def image_data_url_mime_type(data_url):
+    """
+    Return the mime type declared in an image data URL header, without decoding the payload.
+
+    Args:
+        data_url (str): The data URL, e.g. "data:image/jpeg;base64,..."
+
+    Returns:
+        str: The mime type, e.g. "image/jpeg"
+
+    Raises:
+        ValueError: If data_url is not an image data URL
+    """
+    if not isinstance(data_url, str) or not data_url.startswith("data:image"):
+        raise ValueError("Invalid data URL format")
+    header = data_url.split(",", 1)[0]
+    return header[len("data:"):].split(";", 1)[0]
+
+
+def parse_image_data_url(data_url):
+    """
+    Split an image data URL into its mime type and decoded bytes.
+
+    Args:
+        data_url (str): The data URL, e.g. "data:image/jpeg;base64,..."
+
+    Returns:
+        tuple: (mime_type, image_bytes)
+
+    Raises:
+        ValueError: If data_url is not a base64 image data URL
+    """
+    mime_type = image_data_url_mime_type(data_url)
+    _, separator, payload = data_url.partition(",")
+    if not separator:
+        raise ValueError("Data URL has no payload")
+    return mime_type, base64.b64decode(payload)
+
+
+def image_file_extension(mime_type):
+    """
+    Return the file extension for an image mime type, e.g. "jpeg" for "image/jpeg".
+    Falls back to "png" when the mime type has no subtype.
+    """
+    return mime_type.partition("/")[2] or "png"
@@ -1,16 +1,18 @@
 import os
+import io
 import json
-import base64
 import datetime
 import shutil
+import tempfile
 from pathlib import Path
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 import pickle
 import os.path
+from utils.data_urls import image_data_url_mime_type, image_file_extension, parse_image_data_url
 from utils.migrations import migrate_chat_history_format
 
 SCOPES = ['https://www.googleapis.com/auth/drive.file']
@@ -24,7 +26,6 @@ def save_to_google_drive(saved_sessions, active_session, custom_filename=None):
         active_session: Current active session data
         custom_filename: Optional custom filename prefix for saved files
     """
-    output_dir = None
     try:
         # Handle State objects if needed
         if hasattr(saved_sessions, 'value'):
@@ -40,10 +41,6 @@ def save_to_google_drive(saved_sessions, active_session, custom_filename=None):
         else:
             base_filename = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
-        # Create temporary directory for files
-        output_dir = f"temp_saved_images_{base_filename}"
-        os.makedirs(output_dir, exist_ok=True)
-
         creds = None
         # The file token.pickle stores the user's access and refresh tokens
         if os.path.exists('token.pickle'):
@@ -94,32 +91,37 @@ def save_to_google_drive(saved_sessions, active_session, custom_filename=None):
             folder = service.files().create(body=folder_metadata, fields='id').execute()
             folder_id = folder.get('id')
 
-        # Save images from saved sessions
+        # Upload images from saved sessions straight from memory
         for i, session in enumerate(saved_sessions):
             if session.get("image") and isinstance(session["image"], str) and session["image"].startswith("data:image"):
-                filename = os.path.join(output_dir, f"{base_filename}_session_{i}.png")
-                if save_image_from_data_url(session["image"], filename):
-                    # Upload to Drive
-                    file_metadata = {
-                        'name': f"{base_filename}_session_{i}.png",
-                        'parents': [folder_id]
-                    }
-                    media = MediaFileUpload(filename, mimetype='image/png')
-                    service.files().create(
-                        body=file_metadata,
-                        media_body=media,
-                        fields='id'
-                    ).execute()
-
-        # Save and upload active session image
+                try:
+                    mime_type, image_data = parse_image_data_url(session["image"])
+                except ValueError as e:
+                    print(f"Error decoding image data URL: {str(e)}")
+                    continue
+                file_metadata = {
+                    'name': f"{base_filename}_session_{i}.{image_file_extension(mime_type)}",
+                    'parents': [folder_id]
+                }
+                media = MediaIoBaseUpload(io.BytesIO(image_data), mimetype=mime_type)
+                service.files().create(
+                    body=file_metadata,
+                    media_body=media,
+                    fields='id'
+                ).execute()
+
+        # Upload active session image
         if active_session.get("image") and isinstance(active_session["image"], str) and active_session["image"].startswith("data:image"):
-            filename = os.path.join(output_dir, f"{base_filename}_active_session.png")
-            if save_image_from_data_url(active_session["image"], filename):
+            try:
+                mime_type, image_data = parse_image_data_url(active_session["image"])
+            except ValueError as e:
+                print(f"Error decoding image data URL: {str(e)}")
+            else:
                 file_metadata = {
-                    'name': f"{base_filename}_active_session.png",
+                    'name': f"{base_filename}_active_session.{image_file_extension(mime_type)}",
                     'parents': [folder_id]
                 }
-                media = MediaFileUpload(filename, mimetype='image/png')
+                media = MediaIoBaseUpload(io.BytesIO(image_data), mimetype=mime_type)
                 service.files().create(
                     body=file_metadata,
                     media_body=media,
@@ -139,51 +141,28 @@ def save_to_google_drive(saved_sessions, active_session, custom_filename=None):
                 clean_session["image"] = "[IMAGE_DATA_REMOVED]"
             clean_sessions.append(clean_session)
 
-        with open(log_filename, "w", encoding="utf-8") as f:
-            json.dump(clean_sessions, f, indent=2, ensure_ascii=False)
-
-        # Upload log file to Drive
-        file_metadata = {
-            'name': log_filename,
-            'parents': [folder_id]
-        }
-        media = MediaFileUpload(log_filename, mimetype='application/json')
-        service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id'
-        ).execute()
+        # Write the log into a temporary directory that is removed once uploaded
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as temp_dir:
+            log_path = os.path.join(temp_dir, log_filename)
+            with open(log_path, "w", encoding="utf-8") as f:
+                json.dump(clean_sessions, f, indent=2, ensure_ascii=False)
 
-        # Clean up temporary files
-        cleanup_error = None
-        try:
-            if output_dir and os.path.exists(output_dir):
-                for file in os.listdir(output_dir):
-                    os.remove(os.path.join(output_dir, file))
-                os.rmdir(output_dir)
-            if os.path.exists(log_filename):
-                os.remove(log_filename)
-        except Exception as e:
-            cleanup_error = str(e)
-            print(f"Warning: Error during cleanup: {cleanup_error}")
+            # Upload log file to Drive
+            file_metadata = {
+                'name': log_filename,
+                'parents': [folder_id]
+            }
+            media = MediaFileUpload(log_path, mimetype='application/json')
+            service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields='id'
+            ).execute()
 
         success_message = f"✅ Successfully saved all files to Google Drive folder: VisoLearn"
-        if cleanup_error:
-            success_message += f"\n(Warning: Cleanup error: {cleanup_error})"
         return success_message
 
     except Exception as e:
-        # Cleanup on error
-        if output_dir and os.path.exists(output_dir):
-            try:
-                for file in os.listdir(output_dir):
-                    try:
-                        os.remove(os.path.join(output_dir, file))
-                    except:
-                        pass
-                os.rmdir(output_dir)
-            except:
-                pass  # Ignore cleanup errors in error handler
         return f"❌ Error saving to Google Drive: {str(e)}"
 
 def save_all_session_images(saved_sessions, active_session, custom_filename=None):
@@ -217,13 +196,15 @@ def save_all_session_images(saved_sessions, active_session, custom_filename=None
     # Save images from saved sessions
     for i, session in enumerate(saved_sessions):
         if session.get("image") and isinstance(session["image"], str) and session["image"].startswith("data:image"):
-            filename = os.path.join(output_dir, f"{base_filename}_session_{i}.png")
+            extension = image_file_extension(image_data_url_mime_type(session["image"]))
+            filename = os.path.join(output_dir, f"{base_filename}_session_{i}.{extension}")
             if save_image_from_data_url(session["image"], filename):
                 saved_count += 1
 
     # Save image from active session if it exists
     if active_session.get("image") and isinstance(active_session["image"], str) and active_session["image"].startswith("data:image"):
-        filename = os.path.join(output_dir, f"{base_filename}_active_session.png")
+        extension = image_file_extension(image_data_url_mime_type(active_session["image"]))
+        filename = os.path.join(output_dir, f"{base_filename}_active_session.{extension}")
         if save_image_from_data_url(active_session["image"], filename):
             saved_count += 1
 
@@ -241,15 +222,7 @@ def save_image_from_data_url(data_url, filename):
         bool: True if successful, False otherwise
     """
     try:
-        if not data_url or not isinstance(data_url, str) or not data_url.startswith("data:image"):
-            print(f"Invalid data URL format")
-            return False
-
-        # Extract the base64 part from the data URL
-        base64_data = data_url.split(",")[1]
-
-        # Decode the base64 data
-        image_data = base64.b64decode(base64_data)
+        _, image_data = parse_image_data_url(data_url)
 
         # Save to file
         with open(filename, "wb") as f:
@@ -364,16 +337,11 @@ def save_session_to_filesystem(active_session, saved_sessions, custom_name=None)
 
             # Save image to file if it exists
             if session.get("image") and isinstance(session["image"], str) and session["image"].startswith("data:image"):
-                image_filename = f"session_{i}.png"
-                image_path = images_dir / image_filename
-
                 # Extract and save the image
                 try:
-                    # Extract the base64 part from the data URL
-                    base64_data = session["image"].split(",")[1]
-
-                    # Decode the base64 data
-                    image_data = base64.b64decode(base64_data)
+                    mime_type, image_data = parse_image_data_url(session["image"])
+                    image_filename = f"session_{i}.{image_file_extension(mime_type)}"
+                    image_path = images_dir / image_filename
 
                     # Save to file
                     with open(image_path, "wb") as f:
@@ -424,16 +392,15 @@ def list_saved_filesystem_sessions():
         if not base_dir.exists():
             return []
 
-        sessions = []
-        for session_dir in base_dir.iterdir():
-            if not session_dir.is_dir():
-                continue
+        # scandir reports the entry type from the directory listing itself,
+        # so filtering out plain files doesn't cost an extra stat per entry
+        with os.scandir(base_dir) as entries:
+            session_dirs = [Path(entry.path) for entry in entries if entry.is_dir()]
 
+        sessions = []
+        for session_dir in session_dirs:
             # Try to load metadata
             metadata_file = session_dir / "metadata.json"
-            if not metadata_file.exists():
-                continue
-
             try:
                 with open(metadata_file, "r", encoding="utf-8") as f:
                     metadata = json.load(f)
@@ -449,6 +416,9 @@ def list_saved_filesystem_sessions():
                     "sessions_count": sessions_count,
                     "path": str(session_dir)
                 })
+            except FileNotFoundError:
+                # Not a saved session folder
+                continue
             except Exception as e:
                 print(f"Error reading metadata from {session_dir}: {e}")
 
@@ -543,11 +513,8 @@ def load_session_from_filesystem(session_id):
         checklist_items = []
         if active_session and active_session.get("key_details"):
             key_details = active_session.get("key_details", [])
-            identified_details = active_session.get("identified_details", [])
-
-            for i, detail in enumerate(key_details):
-                identified = detail in identified_details
-                checklist_items.append({"detail": detail, "identified": identified, "id": i})
+            identified_details = set(active_session.get("identified_details", []))
+            checklist_items = [{"detail": detail, "identified": detail in identified_details, "id": i} for i, detail in enumerate(key_details)]
 
         return active_session, saved_sessions, f"✅ Loaded session: {metadata.get('custom_name') or session_id}", checklist_items
 
@@ -0,0 +1,97 @@
+import json
+import re
+
+try:
+    # orjson is much faster than the stdlib parser and raises a json.JSONDecodeError subclass
+    from orjson import loads
+except ImportError:
+    loads = json.loads
+
+# Markdown code fences around a JSON answer, compiled once
+_FENCED_BLOCK_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def _iter_object_spans(text, start=0, end=None):
+    """
+    Yield (start, end) spans of the top-level balanced {...} objects in text[start:end].
+    Walks the string once, tracking nesting depth and string literals so braces
+    inside quoted values do not end an object early. Objects nested in another
+    object are never yielded on their own, and an unclosed brace swallows the rest.
+    """
+    depth = 0
+    in_string = False
+    escape = False
+    object_start = None
+    for i in range(start, len(text) if end is None else end):
+        char = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == "{":
+            if depth == 0:
+                object_start = i
+            depth += 1
+        elif depth == 0:
+            # Quotes and closing braces in prose between objects are not JSON
+            continue
+        elif char == '"':
+            in_string = True
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                yield object_start, i + 1
+
+
+def extract_json_object(text):
+    """
+    Return the first balanced {...} object in text, or None if there is none.
+    """
+    for start, end in _iter_object_spans(text):
+        return text[start:end]
+    return None
+
+
+def iter_json_objects(text):
+    """
+    Yield candidate {...} objects from text, most likely answer first.
+    The first object inside each ```json fence comes first, then every other top-level
+    object in order, so a stray brace in prose does not hide the real answer.
+    """
+    fenced_spans = set()
+    for match in _FENCED_BLOCK_RE.finditer(text):
+        for span in _iter_object_spans(text, match.start(1), match.end(1)):
+            fenced_spans.add(span)
+            yield text[span[0]:span[1]]
+            break
+
+    for span in _iter_object_spans(text):
+        if span not in fenced_spans:
+            yield text[span[0]:span[1]]
+
+
+def parse_json_object(text):
+    """
+    Parse a JSON object out of an LLM response.
+    Tries the whole response (minus any ```json fences) first, then falls back to
+    the first candidate object in the text that parses. Returns a dict, or None on failure.
+    """
+    stripped = text.strip().removeprefix("```json").removesuffix("```").strip()
+    try:
+        result = loads(stripped)
+        if isinstance(result, dict):
+            return result
+    except json.JSONDecodeError:
+        pass
+
+    for json_str in iter_json_objects(stripped):
+        try:
+            result = loads(json_str)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(result, dict):
+            return result
+    return None
@@ -6,9 +6,36 @@ from models.prompt_generation import generate_prompt_from_options
 from models.image_generation import generate_image_fn, global_image_data_url, global_image_description
 from models.evaluation import generate_detailed_description, extract_key_details, compare_details_chat_fn, parse_evaluation, update_checklist
 import os
+from concurrent.futures import ThreadPoolExecutor
 from utils.migrations import migrate_chat_history_format
 
 
+def image_to_data_url(image):
+    """
+    Return a data URL for a generated image.
+    Reuses the URL generate_image_fn attached to the image it returned, built from the API bytes,
+    and only re-encodes the image as PNG when there is none.
+    """
+    if hasattr(image, 'save'):  # This is a PIL Image
+        data_url = image.info.get("data_url")
+        if data_url:
+            return data_url
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode('utf-8')}"
+    return image  # Assume it's already a data URL
+
+
+def describe_image(image, prompt, difficulty, topic_focus):
+    """
+    Generate the detailed description and the key details for an image.
+    Both are independent Gemini calls, so they run concurrently.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        description_future = executor.submit(generate_detailed_description, image, prompt, difficulty, topic_focus)
+        details_future = executor.submit(extract_key_details, image, prompt, topic_focus)
+        return description_future.result(), details_future.result()
+
 def generate_image_and_reset_chat(age, autism_level, topic_focus, treatment_plan, attempt_limit_input, details_threshold_input, active_session, saved_sessions, image_style):
     """
     Generate a new image (with the current difficulty) and reset the chat.
@@ -35,22 +62,13 @@ def generate_image_and_reset_chat(age, autism_level, topic_focus, treatment_plan
         # Handle the error - return appropriate message or default image
         return None, active_session, new_sessions, [], active_session.get("chat", [])
 
-    # Convert the image to a data URL if it's a PIL Image
-    if hasattr(image, 'save'):  # This is a PIL Image
-        buffer = io.BytesIO()
-        image.save(buffer, format="PNG")
-        img_bytes = buffer.getvalue()
-        image_data_url = f"data:image/png;base64,{base64.b64encode(img_bytes).decode('utf-8')}"
-        # Update the global variable
-        global_image_data_url = image_data_url
-    else:  # Assume it's already a data URL
-        image_data_url = image
-        global_image_data_url = image_data_url
+    # Get the image as a data URL and update the global variable
+    image_data_url = image_to_data_url(image)
+    global_image_data_url = image_data_url
 
     # Now use the image_data_url for generating description and extracting details
-    image_description = generate_detailed_description(image, generated_prompt, current_difficulty, topic_focus)
+    image_description, key_details = describe_image(image_data_url, generated_prompt, current_difficulty, topic_focus)
     global_image_description = image_description
-    key_details = extract_key_details(image, generated_prompt, topic_focus)
 
     # Convert details_threshold_input to a percentage if it's greater than 1, or keep as is if it's 0-1
     details_threshold = float(details_threshold_input) if details_threshold_input else 0.7
@@ -81,9 +99,7 @@ def generate_image_and_reset_chat(age, autism_level, topic_focus, treatment_plan
     if not saved_sessions and not active_session.get("prompt"):
         new_active_session["chat"] = [{"role": "assistant", "content": "Hi, I Am Wisal , It's nice to meet you! let's get started and find out what you can see in this image."}]
 
-    checklist_items = []
-    for i, detail in enumerate(key_details):
-        checklist_items.append({"detail": detail, "identified": False, "id": i})
+    checklist_items = [{"detail": detail, "identified": False, "id": i} for i, detail in enumerate(key_details)]
 
     # Return the chat history along with other data
     return image, new_active_session, new_sessions, checklist_items, new_active_session["chat"]
@@ -188,22 +204,13 @@ def chat_respond(user_message, active_session, saved_sessions, checklist):
             updated_chat.append({"role": "system", "content": advancement_message})
             return "", updated_chat, new_sessions, active_session, updated_checklist, current_image
 
-        # Convert the image to a data URL if it's a PIL Image
+        # Get the image as a data URL and update the global variable
         global global_image_data_url
-        if hasattr(image, 'save'):  # This is a PIL Image
-            buffer = io.BytesIO()
-            image.save(buffer, format="PNG")
-            img_bytes = buffer.getvalue()
-            image_data_url = f"data:image/png;base64,{base64.b64encode(img_bytes).decode('utf-8')}"
-            # Update the global variable
-            global_image_data_url = image_data_url
-        else:  # Assume it's already a data URL
-            image_data_url = image
-            global_image_data_url = image_data_url
+        image_data_url = image_to_data_url(image)
+        global_image_data_url = image_data_url
 
         # Now use the image_data_url for generating description and extracting details
-        image_description = generate_detailed_description(image, generated_prompt, difficulty_to_use, topic_focus)
-        key_details = extract_key_details(image, generated_prompt, topic_focus)
+        image_description, key_details = describe_image(image_data_url, generated_prompt, difficulty_to_use, topic_focus)
 
         # Create a completely new session
         new_active_session = {
@@ -226,9 +233,7 @@ def chat_respond(user_message, active_session, saved_sessions, checklist):
         }
 
         # Create a new checklist for the new details
-        new_checklist = []
-        for i, detail in enumerate(key_details):
-            new_checklist.append({"detail": detail, "identified": False, "id": i})
+        new_checklist = [{"detail": detail, "identified": False, "id": i} for i, detail in enumerate(key_details)]
 
         # Create an appropriate advancement message
         if attempts_exhausted:
@@ -277,11 +282,6 @@ def load_checklist_from_session(active_session):
         return []
 
     key_details = active_session.get("key_details", [])
-    identified_details = active_session.get("identified_details", [])
-
-    checklist_items = []
-    for i, detail in enumerate(key_details):
-        identified = detail in identified_details
-        checklist_items.append({"detail": detail, "identified": identified, "id": i})
+    identified_details = set(active_session.get("identified_details", []))
 
-    return checklist_items
+    return [{"detail": detail, "identified": detail in identified_details, "id": i} for i, detail in enumerate(key_details)]